@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, LoginAttempt
+from .models import User, LoginAttempt, OutboundEmail
 
 
 @admin.register(User)
@@ -10,7 +10,8 @@ class UserAdmin(BaseUserAdmin):
     list_display = ['email', 'first_name', 'last_name', 'role', 'is_email_verified', 'is_staff', 'date_joined']
     list_filter = ['role', 'is_email_verified', 'is_staff', 'is_superuser']
     search_fields = ['email', 'first_name', 'last_name']
-    ordering = ['-date_joined']
+    # Matches the (role / is_email_verified,) -date_joined, id indexes
+    ordering = ['-date_joined', 'id']
     
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
@@ -44,3 +45,14 @@ class LoginAttemptAdmin(admin.ModelAdmin):
     
     readonly_fields = ['last_attempt']
 
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Admin configuration for OutboundEmail model."""
+    
+    list_display = ['to_email', 'subject', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['to_email', 'subject']
+    ordering = ['-created_at']
+    
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
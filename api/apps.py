@@ -5,3 +5,10 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
 
+    def ready(self):
+        from django.core.signals import request_started
+        from . import signals  # noqa: F401
+        from .purge import get_purge_settings, start_scheduler
+
+        if get_purge_settings()['INTERVAL'] > 0:
+            request_started.connect(start_scheduler)
@@ -0,0 +1,379 @@
+"""
+Native async versions of the authentication endpoints.
+
+Used instead of the DRF views in ``api.views`` when ``ASYNC_VIEWS`` is
+enabled and the project is served over ASGI (uvicorn workers). Database
+access goes through Django's async ORM and password hashing is awaited on
+the hashing pool (or a worker thread), so a single worker can hold many slow
+clients at once instead of blocking one worker per request.
+
+Request validation reuses the serializers from ``api.serializers`` and the
+responses match the sync views field for field.
+"""
+
+import functools
+import io
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+
+from . import hashing, instrumentation, mail, revocation, routers, throttling, write_behind
+from .attempts import get_attempt_backend, get_attempt_settings
+from .authentication import CachedJWTAuthentication
+from .models import User, LoginAttempt
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .serializers import (
+    RegisterSerializer, LoginSerializer, VerifyEmailSerializer,
+    ChangePasswordSerializer, serialize_user
+)
+from .tokens import RefreshToken
+from .utils import generate_verification_code, get_verification_code_expiry
+from .views import get_tokens_for_user
+
+
+class JSONParseError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = 'parse_error'
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """Render ``data`` the way the sync views' renderer does."""
+    with instrumentation.timed('serialize'):
+        return HttpResponse(
+            FastJSONRenderer().render(data),
+            status=status,
+            headers=headers,
+            content_type='application/json',
+        )
+
+
+def exception_response(exc):
+    """Mirror api.exceptions.custom_exception_handler for async views."""
+    detail = exc.detail
+    if isinstance(detail, dict):
+        detail = detail.get('detail', 'An error occurred.')
+    headers = {}
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        headers['WWW-Authenticate'] = 'Bearer realm="api"'
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+    return json_response({
+        'success': False,
+        'message': str(detail)
+    }, status=exc.status_code, headers=headers)
+
+
+def async_api_view(methods, rate_limit=None):
+    """
+    Async counterpart of DRF's @api_view for plain Django views.
+
+    Django 4.2's csrf_exempt and require_http_methods do not support async
+    views, so method checking and CSRF exemption are handled here, and
+    ``rate_limit`` names the ``RATE_LIMITS`` scope to check before the view.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response({
+                    'success': False,
+                    'message': f'Method "{request.method}" not allowed.'
+                }, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                if rate_limit is not None:
+                    email = kwargs.get('email') or parse_json(request).get('email')
+                    await throttling.acheck(rate_limit, request, email if isinstance(email, str) else None)
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                return exception_response(exc)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def parse_json(request):
+    """Return the JSON request body as a dict."""
+    if not request.body:
+        return {}
+    # Raises ParseError, the same 400 the sync views give
+    data = FastJSONParser().parse(io.BytesIO(request.body))
+    if not isinstance(data, dict):
+        raise JSONParseError('JSON parse error - Expected an object.')
+    return data
+
+
+async def authenticate(request):
+    """Return ``(user, validated_token)`` for the request's bearer token or raise a 401."""
+    with instrumentation.timed('auth'):
+        authenticator = CachedJWTAuthentication()
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raise NotAuthenticated()
+        validated_token = await authenticator.aget_validated_token(raw_token)
+        return await authenticator.aget_user(validated_token), validated_token
+
+
+def format_errors(errors):
+    """Flatten serializer errors into the single message the API returns."""
+    messages = []
+    for field, field_messages in errors.items():
+        if isinstance(field_messages, list):
+            messages.append(f"{field}: {', '.join(field_messages)}")
+        else:
+            messages.append(f"{field}: {field_messages}")
+    return '; '.join(messages)
+
+
+# ============================================================================
+# AUTHENTICATION ENDPOINTS
+# ============================================================================
+
+@async_api_view(['POST'], rate_limit='register')
+async def register(request):
+    """
+    POST /api/auth/register/
+    Register a new user.
+    """
+    serializer = RegisterSerializer(data=parse_json(request))
+
+    # validate_email() queries the database
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response({
+            'success': False,
+            'message': format_errors(serializer.errors)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    verification_code = generate_verification_code()
+
+    # The verification code goes in with the user, saving a second write
+    user = await User.objects.acreate_user(
+        email=data['email'],
+        password=data['password'],
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        role=data.get('role', 'maintenance'),
+        verification_code=verification_code,
+        verification_code_expiry=get_verification_code_expiry()
+    )
+    await mail.aenqueue(**mail.verification_email(user, verification_code))
+
+    return json_response({
+        'success': True,
+        'message': 'User registered successfully. Please verify your email.',
+        'user': serialize_user(user),
+        # Remove this in production - only for development
+        'verification_code': verification_code if settings.DEBUG else None
+    }, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['POST'], rate_limit='verify_email')
+async def verify_email(request):
+    """
+    POST /api/auth/verify-email/
+    Verify user email with code.
+    """
+    serializer = VerifyEmailSerializer(data=parse_json(request))
+
+    if not serializer.is_valid():
+        return json_response({
+            'success': False,
+            'message': 'Invalid data provided.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    email = serializer.validated_data['email']
+    code = serializer.validated_data['code']
+
+    try:
+        user = await User.objects.aget(email=email)
+    except User.DoesNotExist:
+        return json_response({
+            'success': False,
+            'message': 'User not found.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if user.is_email_verified:
+        return json_response({
+            'success': False,
+            'message': 'Email is already verified.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if user.verification_code != code:
+        return json_response({
+            'success': False,
+            'message': 'Invalid verification code.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if user.verification_code_expiry and user.verification_code_expiry < timezone.now():
+        return json_response({
+            'success': False,
+            'message': 'Verification code has expired. Please request a new one.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    user.is_email_verified = True
+    user.verification_code = None
+    user.verification_code_expiry = None
+    await user.asave(update_fields=['is_email_verified', 'verification_code', 'verification_code_expiry'])
+
+    return json_response({
+        'success': True,
+        'message': 'Email verified successfully! You can now log in.'
+    })
+
+
+@async_api_view(['POST'], rate_limit='login')
+async def login(request):
+    """
+    POST /api/auth/login/
+    User login with email and password.
+    """
+    serializer = LoginSerializer(data=parse_json(request))
+
+    if not serializer.is_valid():
+        return json_response({
+            'success': False,
+            'message': 'Invalid data provided.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    email = serializer.validated_data['email']
+    password = serializer.validated_data['password']
+
+    try:
+        user = await User.objects.aget(email=email)
+    except User.DoesNotExist:
+        return json_response({
+            'success': False,
+            'message': 'User not found. Please register first.'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    if not user.is_email_verified:
+        return json_response({
+            'success': False,
+            'message': 'Please verify your email before logging in.'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    attempts = get_attempt_backend()
+    max_attempts = get_attempt_settings()['MAX_ATTEMPTS']
+
+    login_attempt = await LoginAttempt.objects.filter(email=email).afirst()
+
+    if login_attempt and login_attempt.blocked and not login_attempt.admin_approved:
+        return json_response({
+            'success': False,
+            'message': 'Account is blocked due to too many failed login attempts. Please contact admin for approval.'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    if await hashing.acheck_password(password, user.password):
+        await attempts.areset(email)
+
+        if hashing.needs_rehash(user.password):
+            user.password = await hashing.amake_password(password)
+            await user.asave(update_fields=['password'])
+        user.last_login_at = timezone.now()
+        await write_behind.last_login.atouch(user.pk, user.last_login_at)
+
+        # Issuing tokens records an OutstandingToken row
+        tokens = await sync_to_async(get_tokens_for_user)(user)
+
+        return json_response({
+            'success': True,
+            'message': 'Login successful',
+            'token': tokens['token'],
+            'refresh_token': tokens['refresh'],
+            'user': serialize_user(user)
+        })
+
+    failed_attempts = await attempts.aincrement(email)
+    remaining_attempts = max_attempts - failed_attempts
+
+    if failed_attempts >= max_attempts:
+        await attempts.ablock(email, failed_attempts)
+        return json_response({
+            'success': False,
+            'message': 'Account is blocked due to too many failed login attempts. Please contact admin for approval.'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    return json_response({
+        'success': False,
+        'message': f'Invalid credentials. {remaining_attempts} attempts remaining.'
+    }, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@routers.replica_reads()
+@async_api_view(['GET'])
+async def get_current_user(request):
+    """
+    GET /api/auth/me/
+    Get current logged-in user info.
+    """
+    user, token = await authenticate(request)
+    return json_response({
+        'success': True,
+        'user': serialize_user(user)
+    })
+
+
+@async_api_view(['POST'])
+async def logout(request):
+    """
+    POST /api/auth/logout/
+    Logout user (token blacklisting).
+    """
+    user, token = await authenticate(request)
+
+    try:
+        # Revoke the access token used for this request
+        await sync_to_async(revocation.revoke)(token, user=user)
+
+        refresh_token = parse_json(request).get('refresh_token')
+        if refresh_token:
+            # Verifying and blacklisting the token both query the database
+            await sync_to_async(lambda: RefreshToken(refresh_token).blacklist())()
+    except Exception:
+        pass
+
+    return json_response({
+        'success': True,
+        'message': 'Logged out successfully'
+    })
+
+
+@async_api_view(['POST'])
+async def change_password(request):
+    """
+    POST /api/auth/change-password/
+    Change user password.
+    """
+    user, token = await authenticate(request)
+    serializer = ChangePasswordSerializer(data=parse_json(request))
+
+    if not serializer.is_valid():
+        return json_response({
+            'success': False,
+            'message': 'Invalid data provided.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    current_password = serializer.validated_data['current_password']
+    new_password = serializer.validated_data['new_password']
+
+    if not await hashing.acheck_password(current_password, user.password):
+        return json_response({
+            'success': False,
+            'message': 'Current password is incorrect.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    user.password = await hashing.amake_password(new_password)
+    user.password_changed_at = timezone.now()
+    await user.asave(update_fields=['password', 'password_changed_at'])
+
+    return json_response({
+        'success': True,
+        'message': 'Password changed successfully!'
+    })
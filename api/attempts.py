@@ -0,0 +1,289 @@
+"""
+Failed-login counters.
+
+Counting failures in the database costs a row write (and a row lock) on every
+login, including successful ones. Counters live in a pluggable backend
+instead, and a ``LoginAttempt`` row is only written once an account actually
+becomes blocked, so a healthy login does no writes to that table.
+
+Select the backend with ``LOGIN_ATTEMPTS['BACKEND']``:
+
+* ``api.attempts.LocMemAttemptBackend`` keeps counters in an in-process LRU.
+  Only suitable for a single worker process.
+* ``api.attempts.CacheAttemptBackend`` uses a Django cache (``CACHES``). With
+  Redis configured, counters are shared between all workers.
+* ``api.attempts.DatabaseAttemptBackend`` counts in the ``LoginAttempt`` row
+  itself, with one atomic upsert per failure. Shared between all workers
+  without Redis and exact under any concurrency, at the cost of a write per
+  failed login.
+
+Reaching ``MAX_ATTEMPTS`` blocks the account through ``block()``, which
+upserts the row in a single statement so concurrent failures cannot race
+each other into duplicate rows.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import routers
+from .models import LoginAttempt
+from .response_cache import invalidate
+from .utils import LRUCache
+
+
+DEFAULTS = {
+    'BACKEND': 'api.attempts.CacheAttemptBackend',
+    'MAX_ATTEMPTS': 5,
+    'TTL': 60 * 60,
+    'CACHE_ALIAS': 'default',
+    'MAX_ENTRIES': 10000,
+}
+
+
+def get_attempt_settings():
+    """Return ``LOGIN_ATTEMPTS`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'LOGIN_ATTEMPTS', {})}
+
+
+class BaseAttemptBackend:
+    """Interface for failed-login counters keyed by email."""
+
+    def __init__(self, options):
+        self.ttl = options['TTL']
+        self.max_attempts = options['MAX_ATTEMPTS']
+
+    def get(self, email):
+        """Return the current number of failed attempts for ``email``."""
+        raise NotImplementedError
+
+    def increment(self, email):
+        """Record a failed attempt and return the new count."""
+        raise NotImplementedError
+
+    def reset(self, email):
+        """Forget all failed attempts for ``email``."""
+        raise NotImplementedError
+
+    def block(self, email, attempts):
+        """Block ``email`` after ``attempts`` failures."""
+        # The counter is kept until an admin approves the account: a failure
+        # that read the row before it was blocked still counts past the limit.
+        persist_block(email, attempts)
+
+    async def aget(self, email):
+        return await sync_to_async(self.get)(email)
+
+    async def aincrement(self, email):
+        return await sync_to_async(self.increment)(email)
+
+    async def areset(self, email):
+        await sync_to_async(self.reset)(email)
+
+    async def ablock(self, email, attempts):
+        await sync_to_async(self.block)(email, attempts)
+
+
+def persist_block(email, attempts):
+    """Mark ``email`` blocked in its ``LoginAttempt`` row, creating it if needed."""
+    values = {
+        # Concurrent blocks keep the highest count, whatever order they land in
+        'attempts': Greatest(F('attempts'), Value(attempts)),
+        'blocked': True,
+        'admin_approved': False,
+        'last_attempt': timezone.now(),
+    }
+    if not LoginAttempt.objects.filter(email=email).update(**values):
+        try:
+            with transaction.atomic():
+                LoginAttempt.objects.create(email=email, attempts=attempts, blocked=True)
+        except IntegrityError:
+            # Another request created the row first
+            LoginAttempt.objects.filter(email=email).update(**values)
+    # update() sends no post_save signal
+    invalidate(f'login_attempts:{email}')
+    routers.pin(f'email:{email}')
+
+
+class LocMemAttemptBackend(BaseAttemptBackend):
+    """Counters held in this process only."""
+
+    def __init__(self, options):
+        super().__init__(options)
+        self._counters = LRUCache(max_entries=options['MAX_ENTRIES'], ttl=self.ttl)
+
+    def get(self, email):
+        return self._counters.get(email, 0)
+
+    def increment(self, email):
+        return self._counters.incr(email)
+
+    def reset(self, email):
+        self._counters.delete(email)
+
+    # In-memory operations are cheap enough to run on the event loop
+    async def aget(self, email):
+        return self.get(email)
+
+    async def aincrement(self, email):
+        return self.increment(email)
+
+    async def areset(self, email):
+        self.reset(email)
+
+
+class CacheAttemptBackend(BaseAttemptBackend):
+    """Counters held in a Django cache, using its atomic ``incr``."""
+
+    key_prefix = 'login-attempts'
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.cache = caches[options['CACHE_ALIAS']]
+
+    def make_key(self, email):
+        return f'{self.key_prefix}:{email}'
+
+    def get(self, email):
+        return self.cache.get(self.make_key(email), 0)
+
+    def increment(self, email):
+        key = self.make_key(email)
+        # add() only sets the key (and its TTL) when it is missing, so the
+        # window starts at the first failure and incr() keeps that expiry.
+        self.cache.add(key, 0, self.ttl)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            self.cache.add(key, 1, self.ttl)
+            return 1
+
+    def reset(self, email):
+        self.cache.delete(self.make_key(email))
+
+    async def aget(self, email):
+        return await self.cache.aget(self.make_key(email), 0)
+
+    async def aincrement(self, email):
+        key = self.make_key(email)
+        await self.cache.aadd(key, 0, self.ttl)
+        try:
+            return await self.cache.aincr(key)
+        except ValueError:
+            await self.cache.aadd(key, 1, self.ttl)
+            return 1
+
+    async def areset(self, email):
+        await self.cache.adelete(self.make_key(email))
+
+
+class DatabaseAttemptBackend(BaseAttemptBackend):
+    """
+    Counters kept in ``LoginAttempt`` rows.
+
+    A failure is one ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``
+    statement that bumps the count and sets ``blocked`` once it reaches
+    ``MAX_ATTEMPTS``. The row lock is held only for that statement, so
+    concurrent failures for the same email queue on the row briefly and
+    none is lost. Databases that cannot return rows from an upsert (SQLite
+    before 3.35, MySQL) fall back to an UPDATE and a read in one transaction.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self._upsert_sql = None
+
+    def get(self, email):
+        attempts = LoginAttempt.objects.filter(email=email).values_list('attempts', flat=True).first()
+        return attempts or 0
+
+    def _get_upsert_sql(self):
+        if self._upsert_sql is None:
+            qn = connection.ops.quote_name
+            table = qn(LoginAttempt._meta.db_table)
+            email, attempts, last_attempt, blocked, admin_approved = (
+                qn(LoginAttempt._meta.get_field(name).column)
+                for name in ('email', 'attempts', 'last_attempt', 'blocked', 'admin_approved')
+            )
+            # Right-hand sides read the row as it was before this update
+            self._upsert_sql = (
+                f'INSERT INTO {table} ({email}, {attempts}, {last_attempt}, {blocked}, {admin_approved}) '
+                f'VALUES (%s, 1, %s, %s, %s) '
+                f'ON CONFLICT ({email}) DO UPDATE SET '
+                f'{attempts} = {table}.{attempts} + 1, '
+                f'{last_attempt} = EXCLUDED.{last_attempt}, '
+                f'{blocked} = ({table}.{blocked} OR {table}.{attempts} + 1 >= %s), '
+                f'{admin_approved} = ({table}.{admin_approved} AND {table}.{attempts} + 1 < %s) '
+                f'RETURNING {attempts}'
+            )
+        return self._upsert_sql
+
+    def increment(self, email):
+        if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+            with connection.cursor() as cursor:
+                cursor.execute(self._get_upsert_sql(), [
+                    email, now, self.max_attempts <= 1, False, self.max_attempts, self.max_attempts,
+                ])
+                attempts = cursor.fetchone()[0]
+        else:
+            attempts = self._increment_fallback(email)
+        invalidate(f'login_attempts:{email}')
+        routers.pin(f'email:{email}')
+        return attempts
+
+    def _increment_fallback(self, email):
+        values = {
+            'attempts': F('attempts') + 1,
+            'last_attempt': timezone.now(),
+            'blocked': Case(
+                When(attempts__gte=self.max_attempts - 1, then=Value(True)),
+                default=F('blocked'),
+            ),
+            'admin_approved': Case(
+                When(attempts__gte=self.max_attempts - 1, then=Value(False)),
+                default=F('admin_approved'),
+            ),
+        }
+        with transaction.atomic():
+            # The UPDATE locks the row until commit, so the read below sees
+            # exactly this increment.
+            if not LoginAttempt.objects.filter(email=email).update(**values):
+                try:
+                    with transaction.atomic():
+                        LoginAttempt.objects.create(
+                            email=email, attempts=1, blocked=self.max_attempts <= 1,
+                        )
+                    return 1
+                except IntegrityError:
+                    LoginAttempt.objects.filter(email=email).update(**values)
+            return LoginAttempt.objects.filter(email=email).values_list('attempts', flat=True).get()
+
+    def reset(self, email):
+        # Only touches rows with something to reset; blocks are lifted by
+        # an admin approval, not by this.
+        if LoginAttempt.objects.filter(email=email, attempts__gt=0, blocked=False).update(attempts=0):
+            invalidate(f'login_attempts:{email}')
+            routers.pin(f'email:{email}')
+
+    def block(self, email, attempts):
+        # increment() has already blocked the row
+        pass
+
+
+_backend = None
+
+
+def get_attempt_backend():
+    """Return the configured backend, created once per process."""
+    global _backend
+    if _backend is None:
+        options = get_attempt_settings()
+        _backend = import_string(options['BACKEND'])(options)
+    return _backend
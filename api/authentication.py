@@ -0,0 +1,174 @@
+"""
+JWT authentication backed by a per-process cache of user snapshots.
+
+simplejwt's ``JWTAuthentication`` loads the user row on every authenticated
+request. ``CachedJWTAuthentication`` keeps recently seen users in an LRU with
+a short TTL and hands each request its own copy, so a warm ``/api/auth/me/``
+does not touch the database. Saving or deleting a ``User`` drops its snapshot
+(see ``api.signals``); other worker processes pick the change up once their
+snapshot expires.
+
+Access tokens are also checked against the token blacklist, through the
+per-process filter in ``api.revocation``.
+"""
+
+import copy
+import hmac
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import instrumentation, revocation, routers
+from .tokens import password_unchanged
+from .utils import LRUCache
+
+
+DEFAULTS = {
+    'TTL': 60,
+    'MAX_ENTRIES': 10000,
+}
+
+_options = {**DEFAULTS, **getattr(settings, 'USER_SNAPSHOT_CACHE', {})}
+user_snapshots = LRUCache(max_entries=_options['MAX_ENTRIES'], ttl=_options['TTL'])
+
+
+def get_user_snapshot(user_id):
+    """
+    Return a private copy of the user with ``user_id``, loading it on a miss.
+
+    Raises ``User.DoesNotExist`` if there is no such user.
+    """
+    snapshot = user_snapshots.get(user_id)
+    if snapshot is None:
+        User = get_user_model()
+        snapshot = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        user_snapshots.set(user_id, snapshot)
+    # Requests may modify and save their user, so never share the cached one.
+    return copy.copy(snapshot)
+
+
+async def aget_user_snapshot(user_id):
+    """Async version of get_user_snapshot()."""
+    snapshot = user_snapshots.get(user_id)
+    if snapshot is None:
+        User = get_user_model()
+        snapshot = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        user_snapshots.set(user_id, snapshot)
+    return copy.copy(snapshot)
+
+
+def get_user_snapshots(user_ids):
+    """
+    Return private copies of the users with ``user_ids``, keyed by id.
+
+    Misses are loaded with one ``IN`` query; ids with no user are left out.
+    """
+    snapshots, missing = {}, []
+    for user_id in user_ids:
+        snapshot = user_snapshots.get(user_id)
+        if snapshot is None:
+            missing.append(user_id)
+        else:
+            snapshots[user_id] = snapshot
+    if missing:
+        User = get_user_model()
+        for snapshot in User.objects.filter(**{f'{api_settings.USER_ID_FIELD}__in': missing}):
+            user_id = getattr(snapshot, api_settings.USER_ID_FIELD)
+            user_snapshots.set(user_id, snapshot)
+            snapshots[user_id] = snapshot
+    return {user_id: copy.copy(snapshot) for user_id, snapshot in snapshots.items()}
+
+
+def invalidate_user(user_id):
+    """Drop the cached snapshot of a user."""
+    user_snapshots.delete(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that resolves users through ``user_snapshots``."""
+
+    def authenticate(self, request):
+        with instrumentation.timed('auth'):
+            return super().authenticate(request)
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if jti is not None and revocation.is_revoked(jti):
+            raise InvalidToken(_("Token is blacklisted"))
+        return validated_token
+
+    async def aget_validated_token(self, raw_token):
+        """Async version of get_validated_token(), for the ASGI views."""
+        validated_token = super().get_validated_token(raw_token)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if jti is not None and await revocation.ais_revoked(jti):
+            raise InvalidToken(_("Token is blacklisted"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        # Users who just wrote to their row read it back from the primary
+        routers.check_pins(f'user:{user_id}')
+        try:
+            user = get_user_snapshot(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        """Async version of get_user(), for the ASGI views."""
+        user_id = self.get_user_id(validated_token)
+        await routers.acheck_pins(f'user:{user_id}')
+        try:
+            user = await aget_user_snapshot(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_user(user, validated_token)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if not password_unchanged(validated_token.get(api_settings.REVOKE_TOKEN_CLAIM), user):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Let a Prometheus server scrape ``/api/metrics/`` with
+    ``Authorization: Bearer <METRICS_TOKEN>``.
+
+    The scraper is not a user, so the request stays anonymous; use the
+    ``HasMetricsToken`` permission to let it in. Any other credentials are
+    left to the next authentication class.
+    """
+
+    def authenticate(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        header = get_authorization_header(request).split()
+        if not token or len(header) != 2 or header[0].lower() != b'bearer':
+            return None
+        if not hmac.compare_digest(header[1], token.encode()):
+            return None
+        return AnonymousUser(), None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -1,7 +1,19 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 
 
+class HashingUnavailable(APIException):
+    """Raised when the password hashing pool is saturated or not responding."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy. Please try again shortly.'
+    default_code = 'hashing_unavailable'
+    # Picked up by DRF's exception handler as a Retry-After header
+    wait = 1
+
+
 def custom_exception_handler(exc, context):
     """
     Custom exception handler for consistent error responses.
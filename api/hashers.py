@@ -0,0 +1,100 @@
+"""
+Password hashers with their cost taken from settings.
+
+Django's hashers hard-code their cost (PBKDF2 iterations, scrypt work
+factor, Argon2 time and memory cost) per release. These subclasses read it
+from ``PASSWORD_HASHER_PROFILE`` instead, so the CPU and memory spent per
+login is a deployment decision. ``python manage.py tune_password_hasher``
+measures the host and suggests values for a latency budget.
+
+``PASSWORD_HASHERS`` lists the profile's algorithm first and the others
+after it, so existing hashes keep verifying. A hash made with another
+algorithm or with other parameters is replaced on the user's next
+successful login (see ``api.hashing.needs_rehash()``), which means raising
+or lowering the cost takes effect gradually, one login at a time.
+
+Argon2 needs ``argon2-cffi`` (``pip install django[argon2]``); scrypt and
+PBKDF2 only need the standard library.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+
+
+DEFAULTS = {
+    'ALGORITHM': PBKDF2PasswordHasher.algorithm,
+    'PBKDF2_ITERATIONS': PBKDF2PasswordHasher.iterations,
+    'SCRYPT_WORK_FACTOR': ScryptPasswordHasher.work_factor,
+    'SCRYPT_BLOCK_SIZE': ScryptPasswordHasher.block_size,
+    'SCRYPT_PARALLELISM': ScryptPasswordHasher.parallelism,
+    'ARGON2_TIME_COST': Argon2PasswordHasher.time_cost,
+    'ARGON2_MEMORY_COST': Argon2PasswordHasher.memory_cost,
+    'ARGON2_PARALLELISM': Argon2PasswordHasher.parallelism,
+}
+
+
+def get_hasher_profile():
+    """Return ``PASSWORD_HASHER_PROFILE`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHER_PROFILE', {})}
+
+
+def scrypt_maxmem(work_factor, block_size, parallelism):
+    """Memory limit for ``hashlib.scrypt()`` that leaves room for the given cost."""
+    # scrypt needs 128 * r * (n + p) bytes; OpenSSL's 32 MiB default is too
+    # small for anything above n=2**14, r=8.
+    return 128 * block_size * (work_factor + parallelism + 2) + 1024 * 1024
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with ``PBKDF2_ITERATIONS`` iterations."""
+
+    @property
+    def iterations(self):
+        return get_hasher_profile()['PBKDF2_ITERATIONS']
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with ``SCRYPT_WORK_FACTOR``, ``SCRYPT_BLOCK_SIZE`` and ``SCRYPT_PARALLELISM``."""
+
+    @property
+    def work_factor(self):
+        return get_hasher_profile()['SCRYPT_WORK_FACTOR']
+
+    @property
+    def block_size(self):
+        return get_hasher_profile()['SCRYPT_BLOCK_SIZE']
+
+    @property
+    def parallelism(self):
+        return get_hasher_profile()['SCRYPT_PARALLELISM']
+
+    @property
+    def maxmem(self):
+        return scrypt_maxmem(self.work_factor, self.block_size, self.parallelism)
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        # Hashes from an older, costlier profile need a higher memory limit
+        hasher = ScryptPasswordHasher()
+        hasher.maxmem = max(self.maxmem, scrypt_maxmem(
+            decoded['work_factor'], decoded['block_size'], decoded['parallelism'],
+        ))
+        return hasher.verify(password, encoded)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with ``ARGON2_TIME_COST``, ``ARGON2_MEMORY_COST`` (KiB) and ``ARGON2_PARALLELISM``."""
+
+    @property
+    def time_cost(self):
+        return get_hasher_profile()['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return get_hasher_profile()['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return get_hasher_profile()['ARGON2_PARALLELISM']
@@ -0,0 +1,339 @@
+"""
+Password hashing worker pool.
+
+Hashing and checking passwords is deliberately slow, so doing it on the
+request thread pins a web worker for the whole hash. Hashes are submitted to
+a process pool sized to the host's cores instead. The number of pending jobs
+is bounded: once it is reached, callers get ``HashingUnavailable`` (503)
+straight away rather than queueing behind a login storm.
+
+Bulk hashing (``make_passwords()``) goes through the same bound one job at
+a time. All batches together keep at most ``BATCH_IN_FLIGHT`` jobs in the
+pool, so a large upload leaves workers and pending slots free for logins.
+A job holds its permits only while it runs, and waiting batches get them in
+turn, so concurrent uploads share the pool instead of blocking each other.
+
+Set ``PASSWORD_HASHING_POOL['WORKERS']`` to 0 to hash inline (development and
+tests); the async variants then hash on a worker thread.
+"""
+
+import asyncio
+import collections
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from . import instrumentation, metrics
+from .exceptions import HashingUnavailable
+
+
+queue_depth = metrics.gauge(
+    'api_password_hash_queue_depth',
+    'Password hashing jobs submitted to the pool and not yet finished.',
+)
+hash_latency = metrics.histogram(
+    'api_password_hash_seconds',
+    'Time from submitting a password hashing job to receiving its result.',
+)
+rejected = metrics.counter(
+    'api_password_hash_rejected_total',
+    'Password hashing jobs rejected because the pool was saturated.',
+)
+
+class FairSemaphore:
+    """
+    Semaphore that hands released permits to waiters in arrival order.
+
+    ``threading.Semaphore`` lets the thread that just released a permit take
+    it straight back, so one busy batch could starve the others.
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        with self._lock:
+            if self._value and not self._waiters:
+                self._value -= 1
+                return True
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        if waiter.wait(timeout):
+            return True
+        with self._lock:
+            # A permit may have been handed over just as the wait timed out
+            if waiter.is_set():
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._value += 1
+
+
+_executor = None
+_slots = None
+_batch_slots = None
+_lock = threading.Lock()
+
+
+def get_pool_settings():
+    """Return the pool configuration with defaults filled in."""
+    config = getattr(settings, 'PASSWORD_HASHING_POOL', {})
+    workers = config.get('WORKERS', os.cpu_count() or 1)
+    max_pending = config.get('MAX_PENDING', max(workers, 1) * 4)
+    batch_in_flight = config.get('BATCH_IN_FLIGHT', max(workers // 2, 1))
+    return {
+        'WORKERS': workers,
+        'MAX_PENDING': max_pending,
+        'TIMEOUT': config.get('TIMEOUT', 10),
+        # Never more than the workers, and never every pending slot
+        'BATCH_IN_FLIGHT': max(1, min(batch_in_flight, workers, max_pending - 1)),
+    }
+
+
+def _get_executor():
+    """Create the pool lazily so it is never inherited across a fork."""
+    global _executor, _slots, _batch_slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                pool_settings = get_pool_settings()
+                _slots = threading.BoundedSemaphore(pool_settings['MAX_PENDING'])
+                _batch_slots = FairSemaphore(pool_settings['BATCH_IN_FLIGHT'])
+                _executor = ProcessPoolExecutor(
+                    max_workers=pool_settings['WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    # Spawned processes inherit DJANGO_SETTINGS_MODULE from
+                    # the environment and only need the app registry loaded.
+                    initializer=django.setup,
+                )
+    return _executor
+
+
+def shutdown():
+    """Stop the pool; a new one is created on the next hash."""
+    global _executor, _slots, _batch_slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
+        _batch_slots = None
+
+
+def _observe(started):
+    elapsed = time.perf_counter() - started
+    hash_latency.observe(elapsed)
+    instrumentation.record('hash', elapsed)
+
+
+def _run(func, *args):
+    pool_settings = get_pool_settings()
+    started = time.perf_counter()
+
+    if pool_settings['WORKERS'] <= 0:
+        result = func(*args)
+        _observe(started)
+        return result
+
+    executor = _get_executor()
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        rejected.inc()
+        raise HashingUnavailable()
+
+    queue_depth.inc()
+    try:
+        future = executor.submit(func, *args)
+        result = future.result(timeout=pool_settings['TIMEOUT'])
+    except FutureTimeoutError:
+        future.cancel()
+        raise HashingUnavailable()
+    except BrokenProcessPool:
+        shutdown()
+        raise HashingUnavailable()
+    finally:
+        queue_depth.dec()
+        slots.release()
+
+    _observe(started)
+    return result
+
+
+async def _arun(func, *args):
+    """Async version of _run() that never blocks the event loop."""
+    pool_settings = get_pool_settings()
+    started = time.perf_counter()
+
+    if pool_settings['WORKERS'] <= 0:
+        result = await sync_to_async(func, thread_sensitive=False)(*args)
+        _observe(started)
+        return result
+
+    executor = _get_executor()
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        rejected.inc()
+        raise HashingUnavailable()
+
+    queue_depth.inc()
+    try:
+        result = await asyncio.wait_for(
+            asyncio.wrap_future(executor.submit(func, *args)),
+            timeout=pool_settings['TIMEOUT'],
+        )
+    except asyncio.TimeoutError:
+        raise HashingUnavailable()
+    except BrokenProcessPool:
+        shutdown()
+        raise HashingUnavailable()
+    finally:
+        queue_depth.dec()
+        slots.release()
+
+    _observe(started)
+    return result
+
+
+def _run_many(func, args_list):
+    """
+    Run ``func`` over ``args_list`` on the pool, ``BATCH_IN_FLIGHT`` at a time.
+
+    Every job takes a batch permit and a pending slot, and is submitted as
+    soon as it has both; it gives them back the moment it finishes. Batch
+    jobs wait for permits instead of failing at once, and only give up with
+    ``HashingUnavailable`` after ``TIMEOUT`` seconds without one.
+    """
+    pool_settings = get_pool_settings()
+    started = time.perf_counter()
+
+    if pool_settings['WORKERS'] <= 0:
+        results = [func(*args) for args in args_list]
+        _observe(started)
+        return results
+
+    executor = _get_executor()
+    slots, batch_slots = _slots, _batch_slots
+    timeout = pool_settings['TIMEOUT']
+
+    def finished(future):
+        queue_depth.dec()
+        slots.release()
+        batch_slots.release()
+
+    futures = []
+    try:
+        for args in args_list:
+            if not batch_slots.acquire(timeout=timeout):
+                rejected.inc()
+                raise HashingUnavailable()
+            if not slots.acquire(timeout=timeout):
+                batch_slots.release()
+                rejected.inc()
+                raise HashingUnavailable()
+            queue_depth.inc()
+            try:
+                future = executor.submit(func, *args)
+            except BaseException:
+                finished(None)
+                raise
+            # Runs straight away if the job is already done
+            future.add_done_callback(finished)
+            futures.append(future)
+        results = [future.result(timeout=timeout) for future in futures]
+    except FutureTimeoutError:
+        raise HashingUnavailable()
+    except BrokenProcessPool:
+        shutdown()
+        raise HashingUnavailable()
+    finally:
+        # Jobs still queued after a failure give their permits back on cancel
+        for future in futures:
+            future.cancel()
+
+    _observe(started)
+    return results
+
+
+def _check_password(password, encoded):
+    return hashers.check_password(password, encoded)
+
+
+def _make_password(password):
+    return hashers.make_password(password)
+
+
+def check_password(password, encoded):
+    """Return True if ``password`` matches the ``encoded`` hash."""
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    return _run(_check_password, password, encoded)
+
+
+def make_password(password):
+    """Return the encoded hash of ``password``."""
+    if password is None:
+        # Unusable passwords are random strings, not real hashes.
+        return hashers.make_password(None)
+    return _run(_make_password, password)
+
+
+async def acheck_password(password, encoded):
+    """Async version of check_password()."""
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    return await _arun(_check_password, password, encoded)
+
+
+async def amake_password(password):
+    """Async version of make_password()."""
+    if password is None:
+        return hashers.make_password(None)
+    return await _arun(_make_password, password)
+
+
+def needs_rehash(encoded):
+    """
+    Return True if ``encoded`` was made with a hasher or parameters other
+    than the preferred ones (see ``api.hashers``).
+    """
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = hashers.get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def make_passwords(passwords):
+    """Return the encoded hashes of ``passwords``, hashed in parallel."""
+    if not passwords:
+        return []
+    return _run_many(_make_password, [(password,) for password in passwords])
+
+
+def stats():
+    """Return a snapshot of the pool metrics."""
+    latency = hash_latency.snapshot()
+    return {
+        'workers': get_pool_settings()['WORKERS'],
+        'queue_depth': queue_depth.value,
+        'rejected': rejected.value,
+        'hashes': latency['count'],
+        'avg_latency_ms': round(latency['sum'] / latency['count'] * 1000, 2) if latency['count'] else None,
+    }
@@ -0,0 +1,100 @@
+"""
+Per-request timing breakdown.
+
+``api.middleware.RequestTimingMiddleware`` puts a ``RequestTimings`` in a
+context variable for the duration of each request. Code on the request path
+adds to it without having to pass anything around:
+
+* every SQL query, through a wrapper installed on each database connection
+  (``install_query_timer``, connected to ``connection_created``);
+* JWT authentication (``api.authentication``);
+* password hashing (``api.hashing``);
+* user serialization and response rendering (``api.serializers``, the
+  middleware itself).
+
+Phases can overlap: a query made while authenticating counts towards both
+``auth`` and ``db``. Outside a request, recording is a no-op.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+
+PHASES = ('auth', 'db', 'hash', 'serialize')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Seconds spent in each phase of one request, plus its query count."""
+
+    __slots__ = ('started', 'durations', 'queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+
+    def add(self, phase, seconds):
+        self.durations[phase] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    """Begin recording a request; returns a token for ``finish()``."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish(token):
+    """Stop recording the request started with ``token``."""
+    _current.reset(token)
+
+
+def current():
+    """Return the timings of the request being handled, or None."""
+    return _current.get()
+
+
+def record(phase, seconds):
+    """Add ``seconds`` to ``phase`` of the current request, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.durations[phase] += seconds
+
+
+@contextmanager
+def timed(phase):
+    """Time the enclosed block as part of ``phase``."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[phase] += time.perf_counter() - started
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.durations['db'] += time.perf_counter() - started
+        timings.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver adding the query timer to ``connection``."""
+    if _time_query not in connection.execute_wrappers:
+        # Outermost, and first in the list so that connection.execute_wrapper()
+        # blocks, which pop() their own wrapper on exit, leave it in place.
+        connection.execute_wrappers.insert(0, _time_query)
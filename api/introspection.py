@@ -0,0 +1,146 @@
+"""
+Batch token introspection for gateways and devices that cannot verify
+tokens themselves.
+
+``introspect()`` answers for a whole batch of tokens with at most two
+queries, however many tokens there are:
+
+* signatures and expiry are checked in-process (``api.signing``);
+* revocation goes through the per-process filter in ``api.revocation``,
+  and the filter's probable hits are confirmed with one ``IN`` query;
+* users come from the snapshot cache in ``api.authentication``, and the
+  misses are loaded with one ``IN`` query.
+
+Gateways ask about the same token over and over, so the answer for each
+well-formed token is cached for ``CACHE_TTL`` seconds, keyed on the token
+itself. No answer is cached past the token's expiry. Logging out,
+deactivation and password changes therefore reach gateways within
+``CACHE_TTL`` seconds, in the same way ``TOKEN_REVOCATION_REFRESH`` delays
+them between workers.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+from . import metrics, revocation, routers, signing
+from .authentication import get_user_snapshots
+from .serializers import serialize_user
+from .tokens import password_unchanged
+from .utils import LRUCache
+
+
+DEFAULTS = {
+    # Keys callers send in X-API-Key; the endpoint refuses everyone without one
+    'API_KEYS': [],
+    'MAX_TOKENS': 100,
+    'CACHE_TTL': 5,
+    'CACHE_MAX_ENTRIES': 10000,
+}
+
+introspected = metrics.counter(
+    'api_introspection_tokens_total',
+    'Tokens looked up by /api/auth/introspect/.',
+)
+cache_hits = metrics.counter(
+    'api_introspection_cache_hits_total',
+    'Introspected tokens answered from the cache.',
+)
+
+
+def get_introspection_settings():
+    """Return ``TOKEN_INTROSPECTION`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_INTROSPECTION', {})}
+
+
+_options = get_introspection_settings()
+results = LRUCache(max_entries=_options['CACHE_MAX_ENTRIES'], ttl=_options['CACHE_TTL'])
+
+
+def _cache_key(raw_token):
+    return hashlib.blake2b(raw_token.encode(), digest_size=16).digest()
+
+
+def _inactive(reason):
+    return {'active': False, 'reason': reason}
+
+
+def introspect(raw_tokens):
+    """
+    Return one result per token, in order.
+
+    Active tokens give ``{'active': True, 'token_type', 'exp', 'iat', 'jti',
+    'user'}``. The user is read now, not taken from the token's claims.
+    Any other token gives ``{'active': False, 'reason'}``, where reason is
+    ``invalid``, ``revoked``, ``user_not_found``, ``user_inactive`` or
+    ``password_changed``.
+    """
+    introspected.inc(len(raw_tokens))
+    answers = {}
+    payloads = {}
+    backend = signing.get_token_backend()
+    for raw_token in dict.fromkeys(raw_tokens):
+        key = _cache_key(raw_token)
+        cached = results.get(key)
+        if cached is not None:
+            cache_hits.inc()
+            answers[raw_token] = cached
+            continue
+        try:
+            payload = backend.decode(raw_token)
+        except TokenBackendError:
+            answers[raw_token] = _inactive('invalid')
+            continue
+        if (
+            payload.get(api_settings.TOKEN_TYPE_CLAIM) not in ('access', 'refresh')
+            or api_settings.JTI_CLAIM not in payload
+            or api_settings.USER_ID_CLAIM not in payload
+        ):
+            answers[raw_token] = _inactive('invalid')
+            continue
+        payloads[raw_token] = payload
+
+    revoked = revocation.revoked_among([payload[api_settings.JTI_CLAIM] for payload in payloads.values()])
+    user_ids = {
+        payload[api_settings.USER_ID_CLAIM]
+        for payload in payloads.values()
+        if payload[api_settings.JTI_CLAIM] not in revoked
+    }
+    if user_ids:
+        # Users who just wrote to their row are read back from the primary
+        routers.check_pins(*(f'user:{user_id}' for user_id in user_ids))
+    users = get_user_snapshots(user_ids)
+
+    for raw_token, payload in payloads.items():
+        answers[raw_token] = _check(payload, revoked, users)
+
+    now = time.time()
+    for raw_token, payload in payloads.items():
+        ttl = min(_options['CACHE_TTL'], payload['exp'] - now)
+        if ttl > 0:
+            results.set(_cache_key(raw_token), answers[raw_token], ttl=ttl)
+    return [answers[raw_token] for raw_token in raw_tokens]
+
+
+def _check(payload, revoked, users):
+    if payload[api_settings.JTI_CLAIM] in revoked:
+        return _inactive('revoked')
+    user = users.get(payload[api_settings.USER_ID_CLAIM])
+    if user is None:
+        return _inactive('user_not_found')
+    if not user.is_active:
+        return _inactive('user_inactive')
+    # Like refresh_token(), whatever CHECK_REVOKE_TOKEN says
+    if not password_unchanged(payload.get(api_settings.REVOKE_TOKEN_CLAIM), user):
+        return _inactive('password_changed')
+    return {
+        'active': True,
+        'token_type': payload[api_settings.TOKEN_TYPE_CLAIM],
+        'exp': payload['exp'],
+        'iat': payload.get('iat'),
+        'jti': payload[api_settings.JTI_CLAIM],
+        'user': serialize_user(user),
+    }
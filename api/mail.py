@@ -0,0 +1,162 @@
+"""
+Queued outbound email.
+
+Views call ``enqueue()`` (or ``aenqueue()``), which only inserts an
+``OutboundEmail`` row. ``python manage.py send_queued_mail`` delivers the
+queue in batches over a single connection to ``EMAIL_BACKEND``, retrying
+failures with exponential backoff until ``MAX_ATTEMPTS`` is reached.
+
+Several workers can run at once: a batch is claimed with a conditional
+``UPDATE`` that leases its rows for ``LEASE`` seconds, so no two workers send
+the same email, and rows claimed by a worker that died are picked up again
+once the lease runs out.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,
+    'LEASE': 5 * 60,
+}
+
+
+def get_mail_queue_settings():
+    """Return ``MAIL_QUEUE`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'MAIL_QUEUE', {})}
+
+
+# ----------------------------------------------------------------------------
+# Messages
+# ----------------------------------------------------------------------------
+
+def verification_email(user, code):
+    return {
+        'to_email': user.email,
+        'subject': 'Verify your email address',
+        'body': (
+            f"Hello {user.first_name},\n\n"
+            f"Your verification code is: {code}\n\n"
+            "It expires in 15 minutes.\n"
+        ),
+    }
+
+
+def admin_approval_email(email, admin_token):
+    return {
+        'to_email': settings.ADMIN_EMAIL,
+        'subject': f'Login approval requested for {email}',
+        'body': (
+            f"{email} was blocked after too many failed login attempts and has "
+            "asked to be unblocked.\n\n"
+            f"To approve, POST to /api/admin/approve-user/ with:\n"
+            f"  email: {email}\n"
+            f"  admin_token: {admin_token}\n"
+        ),
+    }
+
+
+def enqueue(to_email, subject, body):
+    """Queue an email for the worker; a single INSERT."""
+    return OutboundEmail.objects.create(to_email=to_email, subject=subject, body=body)
+
+
+async def aenqueue(to_email, subject, body):
+    """Async version of enqueue()."""
+    return await OutboundEmail.objects.acreate(to_email=to_email, subject=subject, body=body)
+
+
+# ----------------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------------
+
+def claim_batch(batch_size, lease):
+    """Lease up to ``batch_size`` due emails to this worker and return them."""
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=lease)
+    due = OutboundEmail.objects.filter(status__in=['pending', 'sending'], send_after__lte=now)
+    ids = list(due.order_by('send_after', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    # Rows another worker claimed in the meantime no longer match `due`.
+    # The lease expiry tells our rows apart from theirs.
+    due.filter(id__in=ids).update(
+        status='sending',
+        send_after=lease_until,
+        attempts=F('attempts') + 1,
+    )
+    return list(
+        OutboundEmail.objects
+        .filter(id__in=ids, status='sending', send_after=lease_until)
+        .order_by('id')
+    )
+
+
+def _retry_or_fail(email, error, options):
+    if email.attempts >= options['MAX_ATTEMPTS']:
+        OutboundEmail.objects.filter(pk=email.pk).update(status='failed', last_error=error)
+        logger.error('Giving up on email %s to %s: %s', email.pk, email.to_email, error)
+        return
+    delay = options['RETRY_DELAY'] * 2 ** (email.attempts - 1)
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status='pending',
+        send_after=timezone.now() + timedelta(seconds=delay),
+        last_error=error,
+    )
+
+
+def deliver(emails, options=None):
+    """Send claimed emails over one connection; returns ``(sent, failed)``."""
+    options = options or get_mail_queue_settings()
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in emails:
+            _retry_or_fail(email, f'Could not connect: {exc}', options)
+        return 0, len(emails)
+
+    sent_ids = []
+    failed = 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to_email],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                failed += 1
+                _retry_or_fail(email, str(exc), options)
+            else:
+                sent_ids.append(email.pk)
+    finally:
+        connection.close()
+
+    if sent_ids:
+        OutboundEmail.objects.filter(pk__in=sent_ids).update(
+            status='sent', sent_at=timezone.now(), last_error='',
+        )
+    return len(sent_ids), failed
+
+
+def send_queued(batch_size=None):
+    """Deliver one batch; returns ``(sent, failed)``, ``(0, 0)`` when idle."""
+    options = get_mail_queue_settings()
+    emails = claim_batch(batch_size or options['BATCH_SIZE'], options['LEASE'])
+    if not emails:
+        return 0, 0
+    return deliver(emails, options)
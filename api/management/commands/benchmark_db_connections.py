@@ -0,0 +1,134 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections as default_connections
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+
+from api.management.commands.loadtest import percentile
+
+
+MODES = ('new', 'persistent', 'pool')
+
+
+def settings_for(mode, settings_dict, pool_options):
+    """A copy of ``settings_dict`` that reuses connections the way ``mode`` does."""
+    settings = {key: value for key, value in settings_dict.items() if key != 'POOL'}
+    settings['ENGINE'] = {
+        'api.postgresql_pool': 'django.db.backends.postgresql',
+    }.get(settings['ENGINE'], settings['ENGINE'])
+    settings['CONN_HEALTH_CHECKS'] = True
+    if mode == 'new':
+        settings['CONN_MAX_AGE'] = 0
+    elif mode == 'persistent':
+        settings['CONN_MAX_AGE'] = 600
+    else:
+        settings.update({
+            'ENGINE': 'api.postgresql_pool',
+            'CONN_MAX_AGE': 0,
+            'POOL': pool_options,
+        })
+    return settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare a new database connection per request, persistent connections '
+        'and the connection pool by running small queries from concurrent '
+        'request-like threads against the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per mode.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Threads issuing requests (default 4, like gunicorn).')
+        parser.add_argument('--pool-size', type=int, default=4, help='Connections in the pool.')
+        parser.add_argument('--queries', type=int, default=3, help='Queries per request.')
+        parser.add_argument('--mode', choices=MODES, action='append', help='Mode to run (repeatable; default: all that apply).')
+
+    def handle(self, *args, **options):
+        settings_dict = default_connections['default'].settings_dict
+        postgres = default_connections['default'].vendor == 'postgresql'
+        modes = options['mode'] or [mode for mode in MODES if postgres or mode != 'pool']
+        if 'pool' in modes and not postgres:
+            raise CommandError('The connection pool needs PostgreSQL (set DATABASE_URL).')
+        if postgres:
+            # Imports psycopg2, so only when it is there
+            from api.postgresql_pool import base as pool_base
+            pool_options = {**pool_base.DEFAULTS, 'MAX_SIZE': options['pool_size']}
+        else:
+            pool_base = pool_options = None
+
+        self.stdout.write(
+            f"{options['requests']} requests x {options['queries']} queries, "
+            f"{options['concurrency']} threads, {default_connections['default'].vendor}"
+        )
+        self.stdout.write(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'connects':>10}")
+        for mode in modes:
+            handler = ConnectionHandler({'default': settings_for(mode, settings_dict, pool_options)})
+            try:
+                throughput, latencies, connects = self.run(handler, options, pool_base)
+            finally:
+                handler.close_all()
+                if pool_base:
+                    pool_base.close_pools()
+            self.stdout.write(
+                f'{mode:<12}{throughput:>10.0f}{percentile(latencies, 0.5) * 1000:>10.2f}'
+                f'{percentile(latencies, 0.99) * 1000:>10.2f}{connects:>10}'
+            )
+
+    def run(self, handler, options, pool_base=None):
+        """Issue the requests; returns ``(requests/s, sorted latencies, connections opened)``."""
+        pool_created = pool_base.connections_created.value if pool_base else 0
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            if connection.settings_dict is handler.settings['default']:
+                opened.append(1)
+
+        remaining = [options['requests']]
+        lock = threading.Lock()
+        latencies = []
+        errors = []
+
+        def worker():
+            connection = handler['default']
+            try:
+                while True:
+                    with lock:
+                        if not remaining[0]:
+                            break
+                        remaining[0] -= 1
+                    started = time.perf_counter()
+                    # What Django does on request_started / request_finished
+                    connection.close_if_unusable_or_obsolete()
+                    with connection.cursor() as cursor:
+                        for _ in range(options['queries']):
+                            cursor.execute('SELECT 1')
+                            cursor.fetchone()
+                    connection.close_if_unusable_or_obsolete()
+                    latencies.append(time.perf_counter() - started)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        connection_created.connect(count)
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count)
+        if errors:
+            raise CommandError(f'{len(errors)} threads failed: {errors[0]}')
+
+        connects = len(opened)
+        if handler['default'].settings_dict['ENGINE'] == 'api.postgresql_pool':
+            # connection_created fires on every checkout from the pool
+            connects = pool_base.connections_created.value - pool_created
+        return len(latencies) / elapsed, sorted(latencies), connects
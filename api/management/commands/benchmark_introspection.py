@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import introspection
+from api.authentication import user_snapshots
+from api.management.commands.loadtest import throwaway_database
+from api.models import User
+from api.views import get_tokens_for_user
+
+
+API_KEY = 'benchmark-introspection'
+
+
+class Command(BaseCommand):
+    help = (
+        'Time /api/auth/introspect/ for a set of tokens sent one per request '
+        'and in batches, with cold and warm caches, counting queries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1000, help='Distinct tokens (one user each).')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        settings.TOKEN_INTROSPECTION = {
+            **introspection.get_introspection_settings(),
+            'API_KEYS': [API_KEY],
+            'MAX_TOKENS': max(options['batch_size'], 1),
+        }
+        with throwaway_database():
+            password = make_password('Benchmark#123')
+            users = User.objects.bulk_create([
+                User(
+                    email=f'introspect{index}@example.com', password=password,
+                    first_name='Bench', last_name='Mark', is_email_verified=True,
+                )
+                for index in range(options['tokens'])
+            ])
+            tokens = [get_tokens_for_user(user)['token'] for user in User.objects.filter(pk__in=[user.pk for user in users])]
+            client = APIClient()
+            client.credentials(HTTP_X_API_KEY=API_KEY)
+
+            self.stdout.write(f"{len(tokens)} tokens, {connection.vendor}")
+            self.stdout.write(f"{'':<28}{'requests':>10}{'queries':>10}{'tokens/s':>12}")
+            for label, batch_size, cold in (
+                ('one token per request', 1, True),
+                (f"batches of {options['batch_size']}", options['batch_size'], True),
+                (f"batches of {options['batch_size']}, cached", options['batch_size'], False),
+            ):
+                if cold:
+                    introspection.results.clear()
+                    user_snapshots.clear()
+                batches = [tokens[start:start + batch_size] for start in range(0, len(tokens), batch_size)]
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for batch in batches:
+                        response = client.post('/api/auth/introspect/', {'tokens': batch}, format='json')
+                        if not all(result['active'] for result in response.json()['results']):
+                            raise CommandError(f'Unexpected introspection result: {response.content[:200]}')
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{label:<28}{len(batches):>10}{len(queries):>10}{len(tokens) / elapsed:>12.0f}'
+                )
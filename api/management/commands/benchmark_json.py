@@ -0,0 +1,67 @@
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.management.commands.benchmark_serializers import build_users
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.serializers import serialize_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Time FastJSONRenderer and FastJSONParser (orjson) against DRF's JSONRenderer "
+        'and JSONParser on API-sized payloads. api.tests checks that they give the same results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Users in the /api/admin/users/ payload.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case; the best is reported.')
+
+    def handle(self, *args, **options):
+        if not renderers.fast_json_enabled():
+            raise CommandError('orjson is not installed or FAST_JSON is off (pip install orjson).')
+        users = build_users(options['users'])
+
+        login = {
+            'success': True, 'message': 'Login successful!', 'token': 'e' * 300, 'refresh_token': 'r' * 300,
+            'user': serialize_users(users[:1])[0],
+        }
+        all_users = {'success': True, 'users': serialize_users(users), 'next_cursor': None}
+        bulk = json.dumps({'users': [
+            {'email': f'staff{index}@example.com', 'first_name': 'Staff', 'last_name': 'Member', 'role': 'maintenance'}
+            for index in range(len(users))
+        ]}).encode()
+
+        stdlib_render, fast_render = JSONRenderer(), FastJSONRenderer()
+        stdlib_parse, fast_parse = JSONParser(), FastJSONParser()
+        cases = [
+            ('render login response', lambda: stdlib_render.render(login), lambda: fast_render.render(login), 10000),
+            (f'render {len(users)} users', lambda: stdlib_render.render(all_users), lambda: fast_render.render(all_users), 1),
+            (
+                f'parse {len(users)} bulk rows',
+                lambda: stdlib_parse.parse(io.BytesIO(bulk)), lambda: fast_parse.parse(io.BytesIO(bulk)), 1,
+            ),
+        ]
+        self.stdout.write(f"Best of {options['repeat']}:")
+        self.stdout.write(f"{'':<28}{'stdlib ms':>12}{'orjson ms':>12}{'speedup':>10}")
+        for label, stdlib, fast, loops in cases:
+            stdlib_ms = self.best(stdlib, loops, options['repeat']) * 1000
+            fast_ms = self.best(fast, loops, options['repeat']) * 1000
+            self.stdout.write(f'{label:<28}{stdlib_ms:>12.3f}{fast_ms:>12.3f}{stdlib_ms / fast_ms:>9.1f}x')
+
+    def best(self, run, loops, repeat):
+        """Best time of ``repeat`` runs, per call."""
+        best = None
+        for attempt in range(repeat):
+            started = time.perf_counter()
+            for call in range(loops):
+                run()
+            elapsed = (time.perf_counter() - started) / loops
+            best = elapsed if best is None else min(best, elapsed)
+        return best
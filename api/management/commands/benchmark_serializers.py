@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import User
+from api.serializers import UserSerializer, _build_user_converter
+
+
+def build_users(count):
+    """``count`` unsaved users with varied field values."""
+    now = timezone.now()
+    roles = [choice for choice, label in User.ROLE_CHOICES]
+    return [
+        User(
+            id=index,
+            email=f'user{index}@example.com',
+            first_name='First',
+            last_name='Last',
+            role=roles[index % len(roles)],
+            is_email_verified=bool(index % 2),
+            date_joined=now - timedelta(minutes=index),
+            last_login_at=now if index % 3 else None,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare UserSerializer with the precomputed user converter on in-memory users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Number of users to serialize.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per serializer; the best is reported.')
+
+    def handle(self, *args, **options):
+        users = build_users(options['users'])
+        convert = _build_user_converter()
+        tz = timezone.get_current_timezone()
+
+        runs = {
+            'UserSerializer(user).data': lambda: [UserSerializer(user).data for user in users],
+            'UserSerializer(users, many=True).data': lambda: UserSerializer(users, many=True).data,
+            'precomputed converter': lambda: [convert(user, tz) for user in users],
+        }
+
+        results = {}
+        for label, run in runs.items():
+            best = None
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                output = run()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, output)
+
+        expected = results['UserSerializer(users, many=True).data'][1]
+        if [dict(item) for item in expected] != results['precomputed converter'][1]:
+            raise CommandError('Precomputed converter output differs from UserSerializer.')
+
+        baseline = results['UserSerializer(user).data'][0]
+        self.stdout.write(f"Serializing {options['users']} users (best of {options['repeat']}):")
+        for label, (elapsed, output) in results.items():
+            self.stdout.write(
+                f'  {label:<40} {elapsed * 1000:9.1f} ms  '
+                f'{elapsed / len(users) * 1e6:7.2f} us/user  {baseline / elapsed:5.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS('Outputs are identical.'))
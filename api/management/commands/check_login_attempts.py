@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from api import attempts as attempts_module
+from api.models import User, LoginAttempt
+
+from .loadtest import percentile, throwaway_database
+
+
+PASSWORD = 'correct-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire parallel bad logins at one account and check that the failed-login '
+        'accounting is exact: no lost increments, exactly one block, and no errors. '
+        'Runs against a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Bad logins per phase.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Client threads.')
+        parser.add_argument(
+            '--backend', default=None,
+            help='Attempt backend to check (default: LOGIN_ATTEMPTS["BACKEND"]), '
+                 'e.g. api.attempts.DatabaseAttemptBackend.',
+        )
+
+    def handle(self, *args, **options):
+        # Hash with MD5 inline: this checks accounting, not hashing
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        settings.PASSWORD_HASHING_POOL = {**settings.PASSWORD_HASHING_POOL, 'WORKERS': 0}
+        # Rate limits would turn most of these into 429s before they are counted
+        settings.RATE_LIMITS = {**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False}
+        # Every request is a 401 or 403; don't log hundreds of warnings
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        backend = options['backend'] or attempts_module.get_attempt_settings()['BACKEND']
+        max_attempts = attempts_module.get_attempt_settings()['MAX_ATTEMPTS']
+
+        failures = []
+        with throwaway_database():
+            self.stdout.write(f'Backend: {backend}')
+            failures += self.check_counting(backend, options['requests'], options['concurrency'])
+            failures += self.check_blocking(backend, max_attempts, options['requests'], options['concurrency'])
+
+        if failures:
+            raise CommandError('Login attempt accounting is not exact:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Login attempt accounting is exact.'))
+
+    def use_backend(self, backend, max_attempts):
+        settings.LOGIN_ATTEMPTS = {
+            **getattr(settings, 'LOGIN_ATTEMPTS', {}),
+            'BACKEND': backend,
+            'MAX_ATTEMPTS': max_attempts,
+        }
+        # Drop the per-process instance so the new settings take effect
+        attempts_module._backend = None
+        instance = attempts_module.get_attempt_backend()
+
+        returned = []
+        lock = threading.Lock()
+        increment = instance.increment
+
+        def recording_increment(email):
+            value = increment(email)
+            with lock:
+                returned.append(value)
+            return value
+
+        instance.increment = recording_increment
+        return instance, returned
+
+    def make_user(self, email):
+        return User.objects.create(
+            email=email, first_name='Load', last_name='Test',
+            password=make_password(PASSWORD), is_email_verified=True,
+        )
+
+    def fire(self, email, count, concurrency):
+        """Send ``count`` bad logins from ``concurrency`` threads; returns (statuses, latencies, seconds)."""
+        statuses = []
+        latencies = []
+        lock = threading.Lock()
+        remaining = [count]
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        if not remaining[0]:
+                            return
+                        remaining[0] -= 1
+                    started = time.perf_counter()
+                    response = client.post(
+                        '/api/auth/login/', {'email': email, 'password': 'wrong-password'},
+                        content_type='application/json',
+                    )
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        statuses.append(response.status_code)
+                        latencies.append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses, sorted(latencies), time.perf_counter() - started
+
+    def report(self, phase, statuses, latencies, seconds):
+        self.stdout.write(
+            f'{phase}: {len(statuses)} requests, {len(statuses) / seconds:.1f} req/s, '
+            f'p50 {percentile(latencies, 0.5) * 1000:.1f}ms, p95 {percentile(latencies, 0.95) * 1000:.1f}ms'
+        )
+
+    def check_counting(self, backend, count, concurrency):
+        """With a limit out of reach, every failure must be counted exactly once."""
+        instance, returned = self.use_backend(backend, count + 1)
+        email = 'counting@loadtest.local'
+        self.make_user(email)
+
+        statuses, latencies, seconds = self.fire(email, count, concurrency)
+        self.report('counting', statuses, latencies, seconds)
+
+        failures = []
+        unexpected = [code for code in statuses if code != 401]
+        if unexpected:
+            failures.append(f'counting: {len(unexpected)} responses were not 401 (e.g. {unexpected[0]})')
+        if sorted(returned) != list(range(1, count + 1)):
+            duplicates = len(returned) - len(set(returned))
+            failures.append(f'counting: increments returned {len(set(returned))} distinct counts '
+                            f'for {count} failures ({duplicates} duplicates)')
+        final = instance.get(email)
+        if final != count:
+            failures.append(f'counting: final count is {final}, expected {count}')
+        return failures
+
+    def check_blocking(self, backend, max_attempts, count, concurrency):
+        """Exactly MAX_ATTEMPTS - 1 failures get a 401; everything after is blocked."""
+        self.use_backend(backend, max_attempts)
+        email = 'blocking@loadtest.local'
+        self.make_user(email)
+
+        statuses, latencies, seconds = self.fire(email, count, concurrency)
+        self.report('blocking', statuses, latencies, seconds)
+
+        failures = []
+        unauthorized = statuses.count(401)
+        forbidden = statuses.count(403)
+        if unauthorized != max_attempts - 1:
+            failures.append(f'blocking: {unauthorized} failures were allowed, expected {max_attempts - 1}')
+        if unauthorized + forbidden != count:
+            failures.append(f'blocking: {count - unauthorized - forbidden} responses were neither 401 nor 403')
+        rows = list(LoginAttempt.objects.filter(email=email))
+        if len(rows) != 1 or not rows[0].blocked:
+            failures.append(f'blocking: expected one blocked LoginAttempt row, found {rows}')
+        return failures
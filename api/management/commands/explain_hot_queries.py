@@ -0,0 +1,92 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import pagination, purge
+from api.models import User, LoginAttempt, OutboundEmail
+
+
+def hot_queries():
+    """
+    ``(description, queryset, indexes)`` for the queries on the request path.
+
+    ``indexes`` names the indexes the plan may use, or is empty when any
+    index will do (unique constraints are named differently on each
+    database).
+    """
+    users = User.objects.order_by(*pagination.ORDERING)
+    return [
+        ('user by email', User.objects.filter(email='someone@example.com'), ()),
+        ('login attempt by email', LoginAttempt.objects.filter(email='someone@example.com'), ()),
+        ('users, first page', users[:pagination.DEFAULT_PAGE_SIZE + 1], ('api_user_joined_idx',)),
+        ('users by role', users.filter(role='security')[:pagination.DEFAULT_PAGE_SIZE + 1],
+         ('api_user_role_joined_idx',)),
+        # Walking the unfiltered index is as good while most users share the value
+        ('users by verification', users.filter(is_email_verified=False)[:pagination.DEFAULT_PAGE_SIZE + 1],
+         ('api_user_verified_joined_idx', 'api_user_joined_idx')),
+        ('blocked login attempts', LoginAttempt.objects.filter(blocked=True).order_by('-last_attempt')[:100],
+         ('api_loginattempt_blocked_idx',)),
+        ('idle login attempts (purge)', purge.idle_login_attempts(30).order_by('pk').values('pk')[:500],
+         ('api_loginattempt_idle_idx',)),
+        ('due outbound email', OutboundEmail.objects.filter(
+            status__in=['pending', 'sending'], send_after__lte=timezone.now(),
+        ).order_by('send_after', 'id')[:50], ('api_outbound_due_idx',)),
+    ]
+
+
+def uses_full_scan(plan, table):
+    """True if ``plan`` reads ``table`` without an index."""
+    if connection.vendor == 'postgresql':
+        return f'Seq Scan on {table}' in plan
+    # SQLite: "SCAN <table>" alone, as opposed to "SCAN <table> USING INDEX"
+    return re.search(rf'\bSCAN {table}\b(?! USING)', plan) is not None
+
+
+def check_plan(queryset, indexes):
+    """``(plan, problem)`` for one hot query; ``problem`` is None when it uses an index."""
+    table = queryset.model._meta.db_table
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Small tables are cheaper to scan, so the planner would
+            # skip indexes in development; ask whether one is usable.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+
+    if uses_full_scan(plan, table):
+        return plan, f'scans all of {table}'
+    if indexes and not any(index in plan for index in indexes):
+        return plan, f"does not use {' or '.join(indexes)}"
+    return plan, None
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot queries (user and login attempt lookups, the admin user "
+        "listing, purges) and fail if any of them reads a whole table instead of "
+        "its index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Plans cannot be checked on {connection.vendor}.')
+
+        failures = []
+        for description, queryset, indexes in hot_queries():
+            plan, problem = check_plan(queryset, indexes)
+            if problem:
+                failures.append(f'{description}: {problem}')
+                self.stdout.write(self.style.ERROR(f'FAIL  {description}: {problem}'))
+            else:
+                self.stdout.write(f'ok    {description}')
+            if options['verbose_plans'] or problem:
+                self.stdout.write('      ' + plan.replace('\n', '\n      '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries do not use an index.')
+        self.stdout.write(self.style.SUCCESS('Every hot query uses an index.'))
@@ -0,0 +1,51 @@
+import jwt
+from django.core.management.base import BaseCommand, CommandError
+from jwt import algorithms
+
+from api.signing import key_id
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a key pair for signing tokens with RS256 or EdDSA, and print '
+        'the environment variables to set (see api/signing.py).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithm', choices=('RS256', 'EdDSA'), default='EdDSA')
+        parser.add_argument('--rsa-bits', type=int, default=2048)
+
+    def handle(self, *args, **options):
+        if not algorithms.has_crypto:
+            raise CommandError('Generating keys needs cryptography (pip install cryptography).')
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+        algorithm = options['algorithm']
+        if algorithm == 'RS256':
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=options['rsa_bits'])
+        else:
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        kid = key_id(jwt.get_algorithm_by_name(algorithm).to_jwk(private_key.public_key(), as_dict=True))
+
+        escaped = lambda pem: pem.strip().replace('\n', '\\n')
+        self.stdout.write(f'# kid {kid}')
+        self.stdout.write(f'JWT_ALGORITHM={algorithm}')
+        self.stdout.write(f'JWT_PRIVATE_KEY="{escaped(private_pem)}"')
+        self.stdout.write('')
+        self.stdout.write('# Public key, for JWT_PUBLIC_KEYS while rotating to or away from this key:')
+        self.stdout.write(public_pem)
+        self.stderr.write(
+            'Keep JWT_PRIVATE_KEY secret. To rotate without logging anyone out, add the '
+            'public key to JWT_PUBLIC_KEYS first, wait JWT_JWKS_MAX_AGE, then switch '
+            'JWT_PRIVATE_KEY and keep the old public key until its tokens expire.'
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Lower
+
+from api.models import User
+from api.utils import normalize_email
+
+
+class Command(BaseCommand):
+    help = (
+        'List accounts whose email differs from another account only by case. '
+        'Migration 0004 leaves them mixed-case, and logins no longer find them, '
+        'until someone merges or renames them in the admin.'
+    )
+
+    def handle(self, *args, **options):
+        mixed_case = list(
+            User.objects.exclude(email=Lower('email'))
+            .order_by('date_joined', 'id')
+            .values_list('id', 'email', 'date_joined')
+        )
+        owners = dict(
+            User.objects.filter(email__in={normalize_email(email) for _, email, _ in mixed_case})
+            .values_list('email', 'id')
+        )
+        collisions = [
+            (user_id, email, date_joined, owners[normalize_email(email)])
+            for user_id, email, date_joined in mixed_case
+            if normalize_email(email) in owners
+        ]
+        if not collisions:
+            self.stdout.write(self.style.SUCCESS('No accounts differ from another only by case.'))
+            return
+
+        self.stdout.write(f"{'id':>8}  {'email':<40}{'joined':<22}{'lowercase account id':>20}")
+        for user_id, email, date_joined, owner_id in collisions:
+            self.stdout.write(f'{user_id:>8}  {email:<40}{date_joined:%Y-%m-%d %H:%M:%S}   {owner_id:>20}')
+        self.stdout.write(self.style.WARNING(
+            f'{len(collisions)} account(s) cannot log in until they are merged with, '
+            'or renamed away from, the lowercase account.'
+        ))
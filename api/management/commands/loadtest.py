@@ -0,0 +1,292 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+
+from api.models import User, LoginAttempt
+from api.views import get_tokens_for_user
+
+
+SCENARIOS = ['register', 'verify_email', 'login', 'me', 'get_all_users', 'approve_user']
+
+PASSWORD = 'loadtest-password'
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+@contextmanager
+def throwaway_database():
+    """Run the enclosed block against a fresh test copy of the default database."""
+    setup_test_environment()
+    test_db_dir = None
+    if connection.vendor == 'sqlite':
+        # Threads need a file-backed database; the default in-memory test
+        # database cannot be shared between connections safely.
+        test_db_dir = tempfile.mkdtemp(prefix='loadtest-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(test_db_dir, 'loadtest.sqlite3')
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+        if test_db_dir:
+            os.rmdir(test_db_dir)
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the auth API in-process at a given concurrency and report latency '
+        'percentiles, throughput and queries per request. Runs against a throwaway '
+        'test database created from the configured DATABASES (SQLite or PostgreSQL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Client threads per scenario.')
+        parser.add_argument(
+            '--fast-hashing', action='store_true',
+            help='Hash with MD5 inline so results show everything except password hashing cost.',
+        )
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--save-baseline', metavar='PATH', help='Store the results as a baseline.')
+        parser.add_argument('--compare', metavar='PATH', help='Fail if results regress against this baseline.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed relative slowdown of p95 and throughput before --compare fails (default 0.25).',
+        )
+
+    def handle(self, *args, **options):
+        # Every request comes from one IP and would trip the rate limits
+        settings.RATE_LIMITS = {**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False}
+        if options['fast_hashing']:
+            settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+            settings.PASSWORD_HASHING_POOL = {**settings.PASSWORD_HASHING_POOL, 'WORKERS': 0}
+
+        with throwaway_database():
+            results = {}
+            for scenario in options['scenarios']:
+                self.stdout.write(f'Running {scenario}...')
+                requests = getattr(self, f'prepare_{scenario}')(options['requests'])
+                results[scenario] = self.run_scenario(requests, options['concurrency'])
+
+        self.report(results, options)
+
+        if options['output']:
+            self.write_json(options['output'], results)
+        if options['save_baseline']:
+            self.write_json(options['save_baseline'], results)
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}")
+        if options['compare']:
+            self.compare(results, options['compare'], options['tolerance'])
+
+    # ------------------------------------------------------------------
+    # Fixtures: each prepare_* returns a list of (method, path, data,
+    # headers, expected_status) tuples, one per request.
+    # ------------------------------------------------------------------
+
+    def make_users(self, count, prefix, **fields):
+        password = make_password(PASSWORD)
+        now = timezone.now()
+        users = [
+            User(
+                email=f'{prefix}{index}@loadtest.local',
+                first_name='Load',
+                last_name='Test',
+                password=password,
+                date_joined=now - timedelta(seconds=index),
+                **fields
+            )
+            for index in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=500)
+
+    def admin_headers(self):
+        admin, created = User.objects.get_or_create(email=settings.ADMIN_EMAIL, defaults={
+            'first_name': 'Admin', 'last_name': 'User', 'role': 'executive',
+            'is_email_verified': True, 'password': make_password(PASSWORD),
+        })
+        return {'HTTP_AUTHORIZATION': f"Bearer {get_tokens_for_user(admin)['token']}"}
+
+    def prepare_register(self, count):
+        return [
+            ('post', '/api/auth/register/', {
+                'email': f'register{index}@loadtest.local',
+                'first_name': 'Load',
+                'last_name': 'Test',
+                'password': PASSWORD,
+                'role': 'maintenance',
+            }, {}, 201)
+            for index in range(count)
+        ]
+
+    def prepare_verify_email(self, count):
+        users = self.make_users(
+            count, 'verify', verification_code='LOADTS',
+            verification_code_expiry=timezone.now() + timedelta(hours=1),
+        )
+        return [
+            ('post', '/api/auth/verify-email/', {'email': user.email, 'code': 'LOADTS'}, {}, 200)
+            for user in users
+        ]
+
+    def prepare_login(self, count):
+        users = self.make_users(min(count, 50), 'login', is_email_verified=True)
+        return [
+            ('post', '/api/auth/login/', {'email': users[index % len(users)].email, 'password': PASSWORD}, {}, 200)
+            for index in range(count)
+        ]
+
+    def prepare_me(self, count):
+        users = self.make_users(min(count, 50), 'me', is_email_verified=True)
+        headers = [
+            {'HTTP_AUTHORIZATION': f"Bearer {get_tokens_for_user(user)['token']}"}
+            for user in users
+        ]
+        return [('get', '/api/auth/me/', None, headers[index % len(headers)], 200) for index in range(count)]
+
+    def prepare_get_all_users(self, count):
+        self.make_users(1000, 'listed', is_email_verified=True)
+        headers = self.admin_headers()
+        return [('get', '/api/admin/users/', None, headers, 200) for index in range(count)]
+
+    def prepare_approve_user(self, count):
+        LoginAttempt.objects.bulk_create([
+            LoginAttempt(
+                email=f'blocked{index}@loadtest.local', attempts=5, blocked=True,
+                admin_token=f'admin_loadtest_{index}',
+            )
+            for index in range(count)
+        ], batch_size=500)
+        headers = self.admin_headers()
+        return [
+            ('post', '/api/admin/approve-user/', {
+                'email': f'blocked{index}@loadtest.local',
+                'admin_token': f'admin_loadtest_{index}',
+            }, headers, 200)
+            for index in range(count)
+        ]
+
+    # ------------------------------------------------------------------
+    # Running and reporting
+    # ------------------------------------------------------------------
+
+    def run_scenario(self, requests, concurrency):
+        latencies = []
+        query_counts = []
+        errors = []
+        lock = threading.Lock()
+        queue = list(reversed(requests))
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        if not queue:
+                            return
+                        method, path, data, headers, expected = queue.pop()
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        if method == 'post':
+                            response = client.post(path, data, content_type='application/json', **headers)
+                        else:
+                            response = client.get(path, **headers)
+                        elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        query_counts.append(len(queries))
+                        if response.status_code != expected:
+                            errors.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': len(errors),
+            'concurrency': concurrency,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'throughput_rps': round(len(latencies) / wall_time, 1),
+            'queries_per_request': round(sum(query_counts) / len(query_counts), 2),
+        }
+
+    def report(self, results, options):
+        self.stdout.write('')
+        self.stdout.write(
+            f"Database: {connection.vendor}   concurrency: {options['concurrency']}   "
+            f"requests/scenario: {options['requests']}"
+        )
+        self.stdout.write(
+            f"{'scenario':<15}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'req/s':>9}{'queries':>9}"
+        )
+        for scenario, result in results.items():
+            self.stdout.write(
+                f"{scenario:<15}{result['requests']:>6}{result['errors']:>8}{result['p50_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['throughput_rps']:>9}"
+                f"{result['queries_per_request']:>9}"
+            )
+
+    def write_json(self, path, results):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    def compare(self, results, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for scenario, result in results.items():
+            previous = baseline.get(scenario)
+            if previous is None:
+                continue
+            if result['errors'] > previous['errors']:
+                regressions.append(f"{scenario}: errors {previous['errors']} -> {result['errors']}")
+            if result['queries_per_request'] > previous['queries_per_request']:
+                regressions.append(
+                    f"{scenario}: queries/request {previous['queries_per_request']} -> {result['queries_per_request']}"
+                )
+            if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{scenario}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+            if result['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+                regressions.append(
+                    f"{scenario}: throughput {previous['throughput_rps']} -> {result['throughput_rps']} req/s"
+                )
+
+        if regressions:
+            raise CommandError('Regressions against baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}.'))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from api import purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired outstanding/blacklisted tokens and idle zero-attempt '
+        'LoginAttempt rows in small batches. Safe to run against a live database.'
+    )
+
+    def add_arguments(self, parser):
+        options = purge.get_purge_settings()
+        parser.add_argument(
+            '--only', choices=['tokens', 'login-attempts'],
+            help='Purge only one kind of record.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=options['BATCH_SIZE'],
+            help=f"Rows deleted per transaction (default {options['BATCH_SIZE']}).",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=options['BATCH_PAUSE'],
+            help=f"Seconds to sleep between batches (default {options['BATCH_PAUSE']}).",
+        )
+        parser.add_argument(
+            '--idle-days', type=int, default=options['LOGIN_ATTEMPT_IDLE_DAYS'],
+            help='Days a zero-attempt LoginAttempt row must be idle before it is deleted '
+                 f"(default {options['LOGIN_ATTEMPT_IDLE_DAYS']}).",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count what would be deleted.',
+        )
+
+    def handle(self, *args, **options):
+        if options['only'] in (None, 'tokens'):
+            self.purge(
+                'expired tokens',
+                purge.expired_tokens(),
+                lambda progress: purge.purge_expired_tokens(
+                    batch_size=options['batch_size'], pause=options['pause'], progress=progress,
+                ),
+                options['dry_run'],
+            )
+        if options['only'] in (None, 'login-attempts'):
+            self.purge(
+                'idle login attempts',
+                purge.idle_login_attempts(options['idle_days']),
+                lambda progress: purge.purge_idle_login_attempts(
+                    idle_days=options['idle_days'], batch_size=options['batch_size'],
+                    pause=options['pause'], progress=progress,
+                ),
+                options['dry_run'],
+            )
+
+    def purge(self, label, queryset, run, dry_run):
+        total = queryset.count()
+        if dry_run or not total:
+            self.stdout.write(f'{label}: {total} to delete')
+            return
+
+        def progress(deleted):
+            self.stdout.write(f'{label}: deleted {deleted}/{total}')
+
+        deleted = run(progress)
+        self.stdout.write(self.style.SUCCESS(f'{label}: deleted {deleted}'))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import mail
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued outbound emails (verification codes, admin approval requests) '
+        'in batches, retrying failures with backoff.'
+    )
+
+    def add_arguments(self, parser):
+        options = mail.get_mail_queue_settings()
+        parser.add_argument(
+            '--batch-size', type=int, default=options['BATCH_SIZE'],
+            help=f"Emails sent per connection to the mail server (default {options['BATCH_SIZE']}).",
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running and poll the queue instead of exiting once it is empty.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between polls of an empty queue with --loop (default 5).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.drain(options['batch_size'])
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def drain(self, batch_size):
+        """Send batches until the queue has nothing due."""
+        while True:
+            sent, failed = mail.send_queued(batch_size)
+            if not sent and not failed:
+                return
+            self.stdout.write(f'Sent {sent}, failed {failed}')
@@ -0,0 +1,105 @@
+import math
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from api.management.commands.loadtest import throwaway_database
+from api.models import User
+
+
+PASSWORD = 'Simulated#123'
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate a day of user sessions and compare the password hashing CPU they '
+        'cost when clients log in again every time their token expires with '
+        'when they use /api/auth/refresh/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Active users in the day.')
+        parser.add_argument('--token-minutes', type=int, default=20, help='Token lifetime (default 20).')
+        parser.add_argument('--refresh-minutes', type=int, default=15, help='How often clients refresh (default 15).')
+        parser.add_argument('--samples', type=int, default=20, help='Requests timed per kind.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        sessions = self.simulate(options['users'], random.Random(options['seed']))
+        token_minutes = options['token_minutes']
+        refresh_minutes = options['refresh_minutes']
+
+        # Without refresh, the password is sent again every time the token runs out
+        logins_without = sum(math.ceil(length / token_minutes) for length in sessions)
+        # With refresh, once per session; refreshes keep the session alive
+        logins_with = len(sessions)
+        refreshes = sum(math.ceil(length / refresh_minutes) - 1 for length in sessions)
+
+        hash_cpu = self.measure_hash(options['samples'])
+        login_cpu, refresh_cpu = self.measure_requests(options['samples'])
+
+        cpu_without = logins_without * login_cpu
+        cpu_with = logins_with * login_cpu + refreshes * refresh_cpu
+        self.stdout.write(
+            f"{options['users']} users, {len(sessions)} sessions, "
+            f"{statistics.mean(sessions):.0f} min average session"
+        )
+        self.stdout.write(
+            f'CPU per password check {hash_cpu * 1000:.1f}ms, per login request {login_cpu * 1000:.1f}ms, '
+            f'per refresh request {refresh_cpu * 1000:.2f}ms ({settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1]})'
+        )
+        self.stdout.write(f"{'':<24}{'logins':>10}{'refreshes':>12}{'CPU s/day':>12}")
+        self.stdout.write(f"{'re-login on expiry':<24}{logins_without:>10}{0:>12}{cpu_without:>12.1f}")
+        self.stdout.write(f"{'refresh tokens':<24}{logins_with:>10}{refreshes:>12}{cpu_with:>12.1f}")
+        saved = cpu_without - cpu_with
+        self.stdout.write(self.style.SUCCESS(
+            f'Refresh tokens save {saved:.1f} CPU seconds a day ({saved / cpu_without:.0%}), '
+            f'{logins_without - logins_with} password checks ({(logins_without - logins_with) * hash_cpu:.0f}s of hashing).'
+        ))
+
+    def simulate(self, users, rng):
+        """Session lengths in minutes: 1-3 working sessions of 10 minutes to 4 hours per user."""
+        return [
+            rng.randint(10, 240)
+            for _ in range(users)
+            for _ in range(rng.choice((1, 1, 2, 2, 3)))
+        ]
+
+    def measure_hash(self, samples):
+        """CPU seconds for one check_password() with the configured hasher."""
+        encoded = make_password(PASSWORD)
+        started = time.process_time()
+        for _ in range(samples):
+            check_password(PASSWORD, encoded)
+        return (time.process_time() - started) / samples
+
+    def measure_requests(self, samples):
+        """CPU seconds for one login request and one refresh request, hashing inline."""
+        settings.RATE_LIMITS = {**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False}
+        # Hash in this process so process_time() sees it
+        settings.PASSWORD_HASHING_POOL = {**settings.PASSWORD_HASHING_POOL, 'WORKERS': 0}
+        with throwaway_database():
+            User.objects.create_user(
+                email='simulated@example.com', password=PASSWORD,
+                first_name='Simulated', last_name='User', is_email_verified=True,
+            )
+            client = APIClient()
+            credentials = {'email': 'simulated@example.com', 'password': PASSWORD}
+
+            started = time.process_time()
+            for _ in range(samples):
+                response = client.post('/api/auth/login/', credentials, format='json')
+            login_cpu = (time.process_time() - started) / samples
+
+            refresh_token = response.json()['refresh_token']
+            started = time.process_time()
+            for _ in range(samples):
+                response = client.post('/api/auth/refresh/', {'refresh_token': refresh_token}, format='json')
+                refresh_token = response.json()['refresh_token']
+            refresh_cpu = (time.process_time() - started) / samples
+        return login_cpu, refresh_cpu
@@ -0,0 +1,136 @@
+import statistics
+import time
+
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+from api import hashing
+from api.hashers import get_hasher_profile, scrypt_maxmem
+
+
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure password hashing on this host and suggest PASSWORD_HASHER_PROFILE '
+        'values that keep one hash within a latency budget.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--algorithm', choices=['pbkdf2_sha256', 'scrypt', 'argon2'],
+            default=get_hasher_profile()['ALGORITHM'],
+            help='Hasher to tune (default: the configured one).',
+        )
+        parser.add_argument(
+            '--budget-ms', type=float, default=250,
+            help='Target time for one hash, in milliseconds (default 250).',
+        )
+        parser.add_argument(
+            '--max-memory-mib', type=int, default=64,
+            help='Memory one scrypt or Argon2 hash may use, in MiB (default 64).',
+        )
+        parser.add_argument(
+            '--samples', type=int, default=3,
+            help='Hashes timed per candidate; the median is used (default 3).',
+        )
+
+    def handle(self, *args, **options):
+        self.samples = options['samples']
+        budget = options['budget_ms'] / 1000
+        max_memory = options['max_memory_mib'] * 1024 * 1024
+
+        tune = getattr(self, f"tune_{options['algorithm']}")
+        try:
+            params, seconds = tune(budget, max_memory)
+        except ValueError as exc:
+            # Django raises ValueError when argon2-cffi is missing
+            raise CommandError(str(exc))
+
+        workers = max(hashing.get_pool_settings()['WORKERS'], 1)
+        self.stdout.write(f"\n{options['algorithm']}: {seconds * 1000:.1f}ms per hash "
+                          f"(budget {options['budget_ms']:.0f}ms)")
+        self.stdout.write(f'Roughly {workers / seconds:.1f} logins/s with {workers} hashing worker(s)\n')
+        self.stdout.write('Environment variables:')
+        self.stdout.write(f"  PASSWORD_HASHER={options['algorithm']}")
+        for name, value in params.items():
+            self.stdout.write(f'  {name}={value}')
+        self.stdout.write('\nExisting hashes are upgraded to the new parameters as users log in.')
+
+    def measure(self, hasher):
+        """Median seconds for one hash with ``hasher``."""
+        timings = []
+        for _ in range(self.samples):
+            salt = hasher.salt()
+            started = time.perf_counter()
+            hasher.encode(PASSWORD, salt)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    def report(self, description, seconds):
+        self.stdout.write(f'  {description}: {seconds * 1000:.1f}ms')
+
+    def tune_pbkdf2_sha256(self, budget, max_memory):
+        # PBKDF2 cost is linear in iterations: calibrate once, then scale
+        hasher = PBKDF2PasswordHasher()
+        hasher.iterations = 100000
+        per_iteration = self.measure(hasher) / hasher.iterations
+        hasher.iterations = max(int(budget / per_iteration) // 10000 * 10000, 10000)
+
+        seconds = self.measure(hasher)
+        while seconds > budget and hasher.iterations > 10000:
+            hasher.iterations -= 10000
+            seconds = self.measure(hasher)
+        self.report(f'{hasher.iterations} iterations', seconds)
+        return {'PBKDF2_ITERATIONS': hasher.iterations}, seconds
+
+    def tune_scrypt(self, budget, max_memory):
+        # Double the work factor (which sets both time and memory) while it fits
+        hasher = ScryptPasswordHasher()
+        best = None
+        work_factor = 2 ** 10
+        while 128 * hasher.block_size * work_factor <= max_memory:
+            hasher.work_factor = work_factor
+            hasher.maxmem = scrypt_maxmem(work_factor, hasher.block_size, hasher.parallelism)
+            seconds = self.measure(hasher)
+            self.report(f'work factor 2**{work_factor.bit_length() - 1}', seconds)
+            if seconds > budget:
+                break
+            best = (work_factor, seconds)
+            work_factor *= 2
+        if best is None:
+            raise CommandError('Even the smallest scrypt work factor (2**10) is over budget.')
+        return {
+            'SCRYPT_WORK_FACTOR': best[0],
+            'SCRYPT_BLOCK_SIZE': hasher.block_size,
+        }, best[1]
+
+    def tune_argon2(self, budget, max_memory):
+        # Spend the memory allowance first, then add passes while they fit.
+        # One lane per hash: the hashing pool already runs one hash per core.
+        hasher = Argon2PasswordHasher()
+        hasher.parallelism = 1
+        hasher.memory_cost = max_memory // 1024
+        hasher.time_cost = 1
+        seconds = self.measure(hasher)
+        while seconds > budget and hasher.memory_cost > 8 * 1024:
+            hasher.memory_cost //= 2
+            seconds = self.measure(hasher)
+        self.report(f'{hasher.memory_cost} KiB, 1 pass', seconds)
+
+        while True:
+            hasher.time_cost += 1
+            candidate = self.measure(hasher)
+            self.report(f'{hasher.memory_cost} KiB, {hasher.time_cost} passes', candidate)
+            if candidate > budget:
+                hasher.time_cost -= 1
+                break
+            seconds = candidate
+        return {
+            'ARGON2_TIME_COST': hasher.time_cost,
+            'ARGON2_MEMORY_COST': hasher.memory_cost,
+            'ARGON2_PARALLELISM': hasher.parallelism,
+        }, seconds
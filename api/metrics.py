@@ -0,0 +1,191 @@
+"""
+Process-wide metrics registry.
+
+Counters, gauges and histograms registered here are kept in memory by each
+worker process and rendered in the Prometheus text exposition format by
+``render_prometheus()`` (served at ``/api/metrics/``). A metric may carry
+labels; every label combination is a separate series with the same name.
+
+Nothing is shared between processes. With several workers (gunicorn or
+uvicorn ``--workers N``) each scrape of ``/api/metrics/`` returns the
+numbers of whichever worker served it, and counters appear to jump as
+scrapes land on different workers. Run a single worker per instance when
+the numbers matter, or scrape each worker on its own port.
+"""
+
+import threading
+
+
+# Default latency buckets (seconds), roughly covering a cache hit up to a
+# slow password hash under load.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class Counter:
+    """A monotonically increasing count (e.g. rejected jobs)."""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labels=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def snapshot(self):
+        return {'value': self._value}
+
+
+class Gauge:
+    """A value that can go up and down (e.g. queue depth)."""
+
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labels=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    def snapshot(self):
+        return {'value': self._value}
+
+
+class Histogram:
+    """Cumulative bucketed observations (e.g. latencies in seconds)."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, labels=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._sum += value
+            self._count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+
+    def snapshot(self):
+        """Return cumulative bucket counts, sum and count."""
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative.append((bound, running))
+            return {'buckets': cumulative, 'sum': self._sum, 'count': self._count}
+
+
+def _get_or_create(cls, name, documentation, labels=None, **kwargs):
+    key = (name, tuple(sorted(labels.items())) if labels else ())
+    # Metrics are looked up on every request; only lock to register one.
+    metric = _registry.get(key)
+    if metric is not None:
+        return metric
+    with _registry_lock:
+        metric = _registry.get(key)
+        if metric is None:
+            metric = cls(name, documentation, labels=labels, **kwargs)
+            _registry[key] = metric
+        return metric
+
+
+def counter(name, documentation, labels=None):
+    """Get or register a process-wide counter."""
+    return _get_or_create(Counter, name, documentation, labels)
+
+
+def gauge(name, documentation, labels=None):
+    """Get or register a process-wide gauge."""
+    return _get_or_create(Gauge, name, documentation, labels)
+
+
+def histogram(name, documentation, buckets=DEFAULT_BUCKETS, labels=None):
+    """Get or register a process-wide histogram."""
+    return _get_or_create(Histogram, name, documentation, labels, buckets=buckets)
+
+
+def all_metrics():
+    """Return the registered metrics, sorted by name and labels."""
+    with _registry_lock:
+        return [_registry[key] for key in sorted(_registry)]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, **extra):
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs.items()) + '}'
+
+
+def _format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Render every registered metric in the Prometheus text format."""
+    lines = []
+    seen = set()
+    for metric in all_metrics():
+        if metric.name not in seen:
+            seen.add(metric.name)
+            help_text = metric.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f'# HELP {metric.name} {help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+
+        snapshot = metric.snapshot()
+        if metric.type_name != 'histogram':
+            lines.append(f'{metric.name}{_format_labels(metric.labels)} {_format_value(snapshot["value"])}')
+            continue
+
+        for bound, count in snapshot['buckets']:
+            labels = _format_labels(metric.labels, le=_format_value(float(bound)))
+            lines.append(f'{metric.name}_bucket{labels} {count}')
+        labels = _format_labels(metric.labels, le='+Inf')
+        lines.append(f'{metric.name}_bucket{labels} {snapshot["count"]}')
+        lines.append(f'{metric.name}_sum{_format_labels(metric.labels)} {_format_value(snapshot["sum"])}')
+        lines.append(f'{metric.name}_count{_format_labels(metric.labels)} {snapshot["count"]}')
+    return '\n'.join(lines) + '\n'
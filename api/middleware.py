@@ -0,0 +1,143 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import instrumentation, metrics
+
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class RequestTimingMiddleware:
+    """
+    Record where each request spends its time.
+
+    Adds a ``Server-Timing`` header (auth, db with the query count, hash,
+    serialize, total) when SERVER_TIMING is on (by default only with DEBUG),
+    and feeds per-view histograms rendered at ``/api/metrics/``. Views are
+    labelled by URL name, so unmatched paths share a single ``unmatched``
+    series.
+
+    Works in front of both sync (WSGI) and async (ASGI) views. Place it first
+    in MIDDLEWARE so the total covers the other middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING', settings.DEBUG)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.finish(token)
+        return self.finalize(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.finish(token)
+        return self.finalize(request, response, timings)
+
+    def process_template_response(self, request, response):
+        """Count rendering DRF responses as serialization time."""
+        timings = instrumentation.current()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def record_render(response):
+                timings.add('serialize', time.perf_counter() - started)
+
+            response.add_post_render_callback(record_render)
+        return response
+
+    def finalize(self, request, response, timings):
+        total = timings.elapsed()
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        self.observe(view, request.method, response.status_code, timings, total)
+
+        if self.server_timing:
+            response['Server-Timing'] = self.format_header(timings, total)
+        return response
+
+    def format_header(self, timings, total):
+        entries = []
+        for phase, seconds in timings.durations.items():
+            if phase == 'db':
+                entries.append(f'db;dur={seconds * 1000:.2f};desc="{timings.queries} queries"')
+            elif seconds:
+                entries.append(f'{phase};dur={seconds * 1000:.2f}')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+    def observe(self, view, method, status_code, timings, total):
+        metrics.counter(
+            'api_requests_total',
+            'Requests handled, by view, method and status code.',
+            labels={'view': view, 'method': method, 'status': str(status_code)},
+        ).inc()
+        metrics.histogram(
+            'api_request_duration_seconds',
+            'Total time spent handling a request.',
+            labels={'view': view},
+        ).observe(total)
+        metrics.histogram(
+            'api_request_queries',
+            'SQL queries issued per request.',
+            buckets=QUERY_BUCKETS,
+            labels={'view': view},
+        ).observe(timings.queries)
+        for phase, seconds in timings.durations.items():
+            metrics.histogram(
+                'api_request_phase_seconds',
+                'Time spent per request in auth, db, hash and serialize. Phases may overlap.',
+                labels={'view': view, 'phase': phase},
+            ).observe(seconds)
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Report the quota left under the tightest rate limit of the request.
+
+    ``api.throttling`` leaves the usage on the request; this turns it into
+    ``X-RateLimit-Limit``, ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``
+    (seconds until the current window ends) on the response, rejected or not.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    def add_headers(self, request, response):
+        usage = getattr(request, 'rate_limit', None)
+        if usage is not None:
+            response['X-RateLimit-Limit'] = str(usage.limit)
+            response['X-RateLimit-Remaining'] = str(usage.remaining)
+            response['X-RateLimit-Reset'] = str(usage.reset)
+        return response
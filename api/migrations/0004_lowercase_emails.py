@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:25
+
+import logging
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+logger = logging.getLogger(__name__)
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Store every email lowercased, as api.utils.normalize_email() does now.
+
+    Accounts that differ from another only by case are left as they are:
+    merging them needs a person to decide which one is real. Lookups now
+    find the lowercase one; ``manage.py list_email_collisions`` lists the
+    others.
+    """
+    User = apps.get_model('api', 'User')
+    LoginAttempt = apps.get_model('api', 'LoginAttempt')
+
+    taken = set(User.objects.filter(email=Lower('email')).values_list('email', flat=True))
+    mixed_case = User.objects.exclude(email=Lower('email')).order_by('date_joined', 'id')
+    skipped = 0
+    for user_id, email in mixed_case.values_list('id', 'email'):
+        lowered = email.strip().lower()
+        if lowered in taken:
+            skipped += 1
+            continue
+        User.objects.filter(id=user_id).update(email=lowered)
+        taken.add(lowered)
+    if skipped:
+        logger.warning(
+            '%d account(s) left mixed-case because the lowercase email is taken; '
+            'run manage.py list_email_collisions to list them.', skipped,
+        )
+
+    # Counters for the same address are merged into one row
+    for attempt in LoginAttempt.objects.exclude(email=Lower('email')).order_by('id'):
+        email = attempt.email.strip().lower()
+        existing = LoginAttempt.objects.filter(email=email).first()
+        if existing is None:
+            LoginAttempt.objects.filter(id=attempt.id).update(email=email)
+            continue
+        LoginAttempt.objects.filter(id=existing.id).update(
+            attempts=max(existing.attempts, attempt.attempts),
+            blocked=existing.blocked or attempt.blocked,
+            admin_approved=existing.admin_approved and attempt.admin_approved,
+            last_attempt=max(existing.last_attempt, attempt.last_attempt),
+        )
+        attempt.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_lowercase_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='password_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
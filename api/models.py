@@ -2,20 +2,38 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils import timezone
 
+from . import hashing
+from .utils import normalize_email
+
 
 class UserManager(BaseUserManager):
     """Custom user manager for email-based authentication."""
     
+    @classmethod
+    def normalize_email(cls, email):
+        """Lowercase the whole address, not just the domain."""
+        return normalize_email(email or '')
+    
     def create_user(self, email, password=None, **extra_fields):
         """Create and save a regular user with the given email and password."""
         if not email:
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        user.password = hashing.make_password(password)
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        """Async version of create_user(), for the ASGI views."""
+        if not email:
+            raise ValueError('The Email field must be set')
+        email = self.normalize_email(email)
+        user = self.model(email=email, **extra_fields)
+        user.password = await hashing.amake_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, password=None, **extra_fields):
         """Create and save a superuser with the given email and password."""
         extra_fields.setdefault('is_staff', True)
@@ -43,7 +61,7 @@ class User(AbstractUser):
     
     # Remove username, use email for login
     username = None
-    email = models.EmailField(unique=True, db_index=True)
+    email = models.EmailField(unique=True)
     
     # Custom fields
     role = models.CharField(
@@ -55,6 +73,9 @@ class User(AbstractUser):
     verification_code = models.CharField(max_length=10, null=True, blank=True)
     verification_code_expiry = models.DateTimeField(null=True, blank=True)
     last_login_at = models.DateTimeField(null=True, blank=True)
+    # Set by real password changes only, not by rehashing on login; refresh
+    # tokens issued before it are turned down (see api.tokens.password_stamp)
+    password_changed_at = models.DateTimeField(null=True, blank=True)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
@@ -64,16 +85,28 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
     
+    def set_password(self, raw_password):
+        # The admin and manage.py changepassword come through here
+        super().set_password(raw_password)
+        self.password_changed_at = timezone.now()
+    
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-date_joined']
+        indexes = [
+            # Keyset pagination in get_all_users (api/pagination.py), with
+            # and without the role / is_email_verified filters
+            models.Index(fields=['-date_joined', 'id'], name='api_user_joined_idx'),
+            models.Index(fields=['role', '-date_joined', 'id'], name='api_user_role_joined_idx'),
+            models.Index(fields=['is_email_verified', '-date_joined', 'id'], name='api_user_verified_joined_idx'),
+        ]
 
 
 class LoginAttempt(models.Model):
     """Track login attempts to prevent brute force attacks."""
     
-    email = models.EmailField(unique=True, db_index=True)
+    email = models.EmailField(unique=True)
     attempts = models.IntegerField(default=0)
     last_attempt = models.DateTimeField(auto_now=True)
     blocked = models.BooleanField(default=False)
@@ -87,4 +120,56 @@ class LoginAttempt(models.Model):
         verbose_name = 'Login Attempt'
         verbose_name_plural = 'Login Attempts'
         ordering = ['-last_attempt']
+        indexes = [
+            # Blocked accounts awaiting approval (admin list filter); a
+            # small slice of the table, so only those rows are indexed
+            models.Index(
+                fields=['-last_attempt'],
+                condition=models.Q(blocked=True),
+                name='api_loginattempt_blocked_idx',
+            ),
+            # Rows purge_stale_records deletes, walked in id order (api/purge.py)
+            models.Index(
+                fields=['id'],
+                condition=models.Q(attempts=0, blocked=False),
+                name='api_loginattempt_idle_idx',
+            ),
+        ]
+
 
+class OutboundEmail(models.Model):
+    """
+    Outbox of emails waiting to be sent by `manage.py send_queued_mail`.
+    
+    Views only insert a row here, so request latency does not depend on the
+    mail server. See api/mail.py.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Earliest time the next delivery attempt may start
+    send_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
+    
+    class Meta:
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='api_outbound_due_idx'),
+        ]
@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination for the admin user listing.
+
+Users are ordered by ``(-date_joined, id)``, matching ``User.Meta.ordering``
+with ``id`` as a tie-breaker. The cursor is the position of the last row on a
+page, so fetching any page is a single index range scan regardless of how
+deep into the table it is, unlike ``OFFSET``.
+"""
+
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+ORDERING = ('-date_joined', 'id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def encode_cursor(user):
+    """Return an opaque cursor pointing just after ``user``."""
+    position = f'{user.date_joined.isoformat()}|{user.pk}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the ``(date_joined, id)`` position encoded in ``cursor``."""
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_joined, pk = position.rsplit('|', 1)
+        date_joined = parse_datetime(date_joined)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if date_joined is None:
+        raise InvalidCursor(cursor)
+    return date_joined, pk
+
+
+def after_cursor(queryset, cursor):
+    """Restrict an ``ORDERING``-ordered queryset to rows after ``cursor``."""
+    date_joined, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(date_joined__lt=date_joined) | Q(date_joined=date_joined, pk__gt=pk)
+    )
+
+
+def get_page_size(value):
+    """Parse a ``limit`` query parameter, clamped to ``MAX_PAGE_SIZE``."""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``queryset``.
+
+    ``next_cursor`` is None on the last page.
+    """
+    queryset = queryset.order_by(*ORDERING)
+    if cursor:
+        queryset = after_cursor(queryset, cursor)
+
+    # One extra row tells us whether another page exists
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
@@ -0,0 +1,51 @@
+import codecs
+import csv
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import fast_json_enabled, orjson
+
+
+class CSVParser(BaseParser):
+    """
+    Parses a CSV body with a header row into ``{'users': [row, ...]}``.
+
+    Used by the bulk user endpoint so an exported staff spreadsheet can be
+    posted as-is.
+    """
+
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            reader = csv.DictReader(codecs.getreader(encoding)(stream))
+            return {'users': [row for row in reader]}
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
+
+
+class FastJSONParser(JSONParser):
+    """
+    ``JSONParser`` backed by orjson for UTF-8 bodies.
+
+    Bodies orjson rejects are parsed again by ``JSONParser``. Invalid JSON
+    gets the same error as before, and JSON that only the standard library
+    accepts (lone surrogates, numbers too large for a double) parses as
+    before. Integers over 64 bits come back as floats.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not fast_json_enabled() or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -1,3 +1,5 @@
+import hmac
+
 from rest_framework import permissions
 from django.conf import settings
 
@@ -16,3 +18,30 @@ class IsAdmin(permissions.BasePermission):
         # Check if user email matches admin email
         return request.user.email == settings.ADMIN_EMAIL
 
+
+class HasIntrospectionKey(permissions.BasePermission):
+    """
+    Allow services sending one of TOKEN_INTROSPECTION['API_KEYS'] in the
+    X-API-Key header.
+    """
+    
+    def has_permission(self, request, view):
+        from .introspection import get_introspection_settings
+        
+        api_key = request.headers.get('X-API-Key', '')
+        return bool(api_key) and any(
+            hmac.compare_digest(api_key.encode(), key.encode())
+            for key in get_introspection_settings()['API_KEYS']
+        )
+
+
+class HasMetricsToken(permissions.BasePermission):
+    """
+    Allow a scraper authenticated by MetricsTokenAuthentication
+    (METRICS_TOKEN sent as a bearer token).
+    """
+    
+    def has_permission(self, request, view):
+        from .authentication import MetricsTokenAuthentication
+        
+        return isinstance(request.successful_authenticator, MetricsTokenAuthentication)
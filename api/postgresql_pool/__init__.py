@@ -0,0 +1,6 @@
+"""
+PostgreSQL backend that keeps a pool of open connections per process.
+
+Select it with ``ENGINE = 'api.postgresql_pool'`` (``DB_POOL_MODE=pool``).
+See ``base.py``.
+"""
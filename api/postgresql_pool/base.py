@@ -0,0 +1,206 @@
+"""
+Pooled PostgreSQL connections.
+
+With Django's own connection handling each thread keeps its own connection
+(``CONN_MAX_AGE``), so a gthread worker holds one per thread whether busy or
+not, and after a restart or failover every thread pays for a new TCP, TLS
+and authentication handshake on its next request. This backend hands
+connections out of a per-process pool instead:
+
+* A request checks a connection out when it first touches the database and
+  returns it when Django closes the connection at the end of the request
+  (``CONN_MAX_AGE = 0``), so at most ``MAX_SIZE`` connections serve all of
+  the worker's threads. Requests beyond that wait up to ``TIMEOUT`` seconds.
+* A connection that has been idle for more than ``HEALTH_CHECK_AFTER``
+  seconds is tested with ``SELECT 1`` before being handed out; broken ones
+  are dropped and replaced, so a failover costs one reconnect instead of a
+  burst of errors.
+* Connections are retired after ``MAX_LIFETIME`` seconds so the pool follows
+  DNS changes and does not hold server-side memory forever.
+* Connections returned after an error, or in an unknown state, are closed
+  instead of being reused.
+
+Configure it under ``DATABASES['default']['POOL']``; see ``DEFAULTS``.
+"""
+
+import collections
+import os
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base, creation
+
+from api import metrics
+
+
+DEFAULTS = {
+    'MAX_SIZE': 4,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 10 * 60,
+    'HEALTH_CHECK_AFTER': 1,
+}
+
+connections_created = metrics.counter(
+    'api_db_pool_connections_created_total',
+    'Database connections opened by the pool.',
+)
+connections_discarded = metrics.counter(
+    'api_db_pool_connections_discarded_total',
+    'Pooled database connections closed because they were broken, failed a health check or got too old.',
+)
+checkout_wait = metrics.histogram(
+    'api_db_pool_checkout_seconds',
+    'Time spent waiting for a pooled database connection.',
+)
+in_use = metrics.gauge(
+    'api_db_pool_connections_in_use',
+    'Pooled database connections checked out by a request.',
+)
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no pooled connection frees up within ``TIMEOUT``."""
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of psycopg connections."""
+
+    def __init__(self, options):
+        self.options = options
+        self._slots = threading.BoundedSemaphore(options['MAX_SIZE'])
+        # (connection, created_at, returned_at); LIFO keeps a few connections
+        # busy and lets the rest age out.
+        self._idle = collections.deque()
+        self._created = {}
+
+    def _discard(self, connection):
+        self._created.pop(id(connection), None)
+        connections_discarded.inc()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, connection, created_at, returned_at, now):
+        if connection.closed:
+            return False
+        if now - created_at > self.options['MAX_LIFETIME']:
+            return False
+        if now - returned_at > self.options['HEALTH_CHECK_AFTER']:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except base.Database.Error:
+                return False
+        return True
+
+    def acquire(self, connect):
+        """Return an idle connection, or one made with ``connect()``."""
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.options['TIMEOUT']):
+            raise PoolTimeout(
+                f"No database connection became free within {self.options['TIMEOUT']}s "
+                f"(pool size {self.options['MAX_SIZE']})."
+            )
+        checkout_wait.observe(time.perf_counter() - started)
+        try:
+            while True:
+                try:
+                    connection, created_at, returned_at = self._idle.pop()
+                except IndexError:
+                    connection = connect()
+                    self._created[id(connection)] = time.monotonic()
+                    connections_created.inc()
+                    break
+                if self._is_usable(connection, created_at, returned_at, time.monotonic()):
+                    break
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+        in_use.inc()
+        return connection
+
+    def release(self, connection, reusable=True):
+        """Give ``connection`` back, closing it unless it is clean and ``reusable``."""
+        try:
+            status = connection.info.transaction_status if not connection.closed else None
+            if status == base.Database.extensions.TRANSACTION_STATUS_INTRANS and reusable:
+                # Django rolls back on errors, but be safe about what the
+                # next request inherits
+                connection.rollback()
+                status = connection.info.transaction_status
+            created_at = self._created.get(id(connection))
+            if reusable and created_at is not None and status == base.Database.extensions.TRANSACTION_STATUS_IDLE:
+                self._idle.append((connection, created_at, time.monotonic()))
+            else:
+                self._discard(connection)
+        except base.Database.Error:
+            self._discard(connection)
+        finally:
+            in_use.dec()
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection."""
+        while self._idle:
+            connection = self._idle.pop()[0]
+            self._created.pop(id(connection), None)
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = None
+
+
+def get_pool(settings_dict):
+    """The pool for the database described by ``settings_dict``, made on first use in each process."""
+    global _pools_pid
+    key = (settings_dict['HOST'], settings_dict['PORT'], settings_dict['NAME'], settings_dict['USER'])
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Connections must never be shared with a forked parent
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if key not in _pools:
+            _pools[key] = ConnectionPool({**DEFAULTS, **settings_dict.get('POOL', {})})
+        return _pools[key]
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database in use
+        get_pool(self.connection.settings_dict).close()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL wrapper that borrows its connection from a ``ConnectionPool``."""
+
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        # Remembered so the connection goes back to the same pool even if
+        # settings_dict changes meanwhile (e.g. NAME for the test database)
+        self._pool = get_pool(self.settings_dict)
+        return self._pool.acquire(lambda: connect(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            # close_if_unusable_or_obsolete() clears errors_occurred for
+            # connections that pass is_usable(), so an error here means broken
+            self._pool.release(self.connection, reusable=not self.errors_occurred)
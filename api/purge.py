@@ -0,0 +1,185 @@
+"""
+Garbage collection for tables that otherwise grow forever.
+
+* ``OutstandingToken`` gets a row for every token issued, and blacklisted
+  tokens keep theirs; once a token has expired neither row is needed, since
+  the token would be rejected anyway.
+* ``LoginAttempt`` rows that hold no failed attempts and are not blocked
+  (e.g. after an admin approval) carry no state once they have been idle
+  for a while.
+
+Rows are deleted in small batches, each in its own short transaction,
+walking the primary key so no batch rescans rows already handled. Pausing
+between batches leaves room for live traffic on the same tables.
+
+Run ``python manage.py purge_stale_records`` from cron, or set
+``PURGE['INTERVAL']`` to have every web process run it in a background
+thread; a cache lock stops workers that share a cache from purging at the
+same time.
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .models import LoginAttempt
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'INTERVAL': 0,
+    'BATCH_SIZE': 500,
+    'BATCH_PAUSE': 0.1,
+    'LOGIN_ATTEMPT_IDLE_DAYS': 30,
+}
+
+LOCK_KEY = 'purge-stale-records-lock'
+
+
+def get_purge_settings():
+    """Return ``PURGE`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'PURGE', {})}
+
+
+def _purge_in_batches(queryset, delete_batch, batch_size, pause, progress):
+    """
+    Delete the rows of ``queryset`` batch by batch, in primary key order.
+
+    ``delete_batch(queryset, ids)`` deletes the rows of one batch that still
+    match ``queryset`` and returns how many it deleted; it runs in its own
+    transaction. ``progress(deleted_so_far)`` is called after every batch.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += delete_batch(queryset, ids)
+        last_id = ids[-1]
+        if progress:
+            progress(deleted)
+        if len(ids) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def _delete_tokens(queryset, ids):
+    batch = queryset.filter(pk__in=ids)
+    # Delete the blacklist rows explicitly so Django does not have to
+    # collect the cascade one token at a time.
+    BlacklistedToken.objects.filter(token__in=batch).delete()
+    deleted, by_model = batch.delete()
+    return by_model.get(OutstandingToken._meta.label, 0)
+
+
+def _delete_login_attempts(queryset, ids):
+    # The rows were idle when selected, but a failed login or a block may
+    # have touched them since; the idle condition is checked again here so
+    # those rows survive.
+    deleted, by_model = queryset.filter(pk__in=ids).delete()
+    return by_model.get(LoginAttempt._meta.label, 0)
+
+
+def expired_tokens(now=None):
+    """Outstanding (and blacklisted) tokens that have expired."""
+    return OutstandingToken.objects.filter(expires_at__lt=now or timezone.now())
+
+
+def idle_login_attempts(idle_days, now=None):
+    """LoginAttempt rows with nothing to remember that have been idle for ``idle_days``."""
+    cutoff = (now or timezone.now()) - timedelta(days=idle_days)
+    return LoginAttempt.objects.filter(attempts=0, blocked=False, last_attempt__lt=cutoff)
+
+
+def purge_expired_tokens(batch_size=None, pause=None, progress=None):
+    """Delete expired tokens; returns the number deleted."""
+    options = get_purge_settings()
+    return _purge_in_batches(
+        expired_tokens(), _delete_tokens,
+        batch_size or options['BATCH_SIZE'],
+        options['BATCH_PAUSE'] if pause is None else pause,
+        progress,
+    )
+
+
+def purge_idle_login_attempts(idle_days=None, batch_size=None, pause=None, progress=None):
+    """Delete idle zero-attempt LoginAttempt rows; returns the number deleted."""
+    options = get_purge_settings()
+    return _purge_in_batches(
+        idle_login_attempts(options['LOGIN_ATTEMPT_IDLE_DAYS'] if idle_days is None else idle_days),
+        _delete_login_attempts,
+        batch_size or options['BATCH_SIZE'],
+        options['BATCH_PAUSE'] if pause is None else pause,
+        progress,
+    )
+
+
+def purge_all():
+    """Run every purge with the configured settings; returns counts by table."""
+    return {
+        'tokens': purge_expired_tokens(),
+        'login_attempts': purge_idle_login_attempts(),
+    }
+
+
+# ----------------------------------------------------------------------------
+# In-process scheduler
+# ----------------------------------------------------------------------------
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _scheduled_purge(interval):
+    # Spread workers started together across the interval
+    time.sleep(random.uniform(0, interval))
+    while True:
+        try:
+            if cache.add(LOCK_KEY, True, timeout=interval):
+                counts = purge_all()
+                logger.info('Purged stale records: %s', counts)
+        except Exception:
+            logger.exception('Scheduled purge failed')
+        finally:
+            # Do not hold a connection open while sleeping
+            connections.close_all()
+        time.sleep(interval)
+
+
+def start_scheduler(**kwargs):
+    """
+    ``request_started`` receiver starting the purge thread in this process.
+
+    Starting on the first request rather than in ``AppConfig.ready()`` keeps
+    management commands from purging, and puts the thread in each worker
+    after the server has forked.
+    """
+    global _scheduler
+    interval = get_purge_settings()['INTERVAL']
+    if _scheduler is not None or interval <= 0:
+        return
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = threading.Thread(
+                target=_scheduled_purge, args=(interval,),
+                name='purge-stale-records', daemon=True,
+            )
+            _scheduler.start()
+    request_started.disconnect(start_scheduler)
@@ -0,0 +1,168 @@
+"""
+Response caching for read-only endpoints.
+
+``@cache_response`` stores the rendered body of a successful response in a
+Django cache, keyed by the view, the caller's scope (user id, role, or
+nobody), the URL arguments and the query string. Repeated polls are answered
+from the cache without touching the database or the serializers, and every
+response carries an ``ETag`` so clients sending ``If-None-Match`` get a bodiless
+304 when nothing changed.
+
+Entries belong to namespaces (e.g. ``users`` or ``user:42``). Invalidating a
+namespace gives it a new version, which makes every entry stored under the
+old version unreachable; ``api.signals`` does this whenever a ``User`` or
+``LoginAttempt`` is saved or deleted. Writes that bypass model signals
+(``bulk_create()``, ``QuerySet.update()``) must call ``invalidate()``.
+
+Versions live in the same cache as the entries, so with the in-process cache
+each worker only sees its own invalidations and may serve a stale body for up
+to ``TIMEOUT`` seconds after another worker's write. Use Redis (``REDIS_URL``)
+to share them.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+
+DEFAULTS = {
+    'TIMEOUT': 30,
+    'CACHE_ALIAS': 'default',
+}
+
+KEY_PREFIX = 'response-cache'
+
+
+def get_response_cache_settings():
+    """Return ``RESPONSE_CACHE`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def _get_cache():
+    return caches[get_response_cache_settings()['CACHE_ALIAS']]
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:version:{namespace}'
+
+
+def _new_version():
+    # Unique rather than incremented, so an evicted version can never come
+    # back with a value that old entries were stored under.
+    return time.time_ns()
+
+
+def get_versions(namespaces):
+    """Return the current version of each namespace, creating missing ones."""
+    cache = _get_cache()
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """Drop every cached response stored under ``namespaces``."""
+    _get_cache().set_many(
+        {_version_key(namespace): _new_version() for namespace in namespaces},
+        timeout=None,
+    )
+
+
+def make_etag(body):
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def _finish(request, etag, body, content_type):
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response['ETag'] = etag
+    # The body depends on who is asking, so shared caches must not keep it
+    # and browsers must revalidate before reusing it.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _scope(request, scope):
+    if scope == 'user':
+        return f'user={request.user.pk}'
+    if scope == 'role':
+        return f'role={request.user.role}'
+    return 'public'
+
+
+def cache_response(namespaces, scope='user', vary_on=None):
+    """
+    Cache the JSON body of a DRF function view's 200 responses.
+
+    ``namespaces(request, **kwargs)`` returns the namespaces the response
+    belongs to. ``scope`` is ``'user'``, ``'role'`` or ``None`` and says whose
+    responses may be shared. ``vary_on(request, **kwargs)``, if given, returns
+    a string that is added to the key, for state outside the namespaces.
+
+    Apply it below ``@api_view`` and ``@permission_classes`` so that
+    authentication and permission checks still run on every request.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            renderer = request.accepted_renderer
+            if renderer.format != 'json':
+                # Leave the browsable API alone
+                return view(request, *args, **kwargs)
+
+            options = get_response_cache_settings()
+            cache = _get_cache()
+            view_namespaces = namespaces(request, **kwargs)
+            versions = get_versions(view_namespaces)
+            key_parts = [
+                view.__name__,
+                _scope(request, scope),
+                repr(sorted(kwargs.items())),
+                repr(sorted(request.query_params.lists())),
+                repr(versions),
+            ]
+            if vary_on is not None:
+                key_parts.append(vary_on(request, **kwargs))
+            digest = hashlib.blake2b('|'.join(key_parts).encode(), digest_size=20).hexdigest()
+            key = f'{KEY_PREFIX}:{view.__name__}:{digest}'
+
+            cached = cache.get(key)
+            if cached is not None:
+                return _finish(request, *cached)
+
+            response = view(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != status.HTTP_200_OK:
+                return response
+
+            body = renderer.render(response.data, request.accepted_media_type, {})
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            entry = (make_etag(body), body, content_type)
+            if options['TIMEOUT'] > 0:
+                cache.set(key, entry, options['TIMEOUT'])
+            return _finish(request, *entry)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,321 @@
+"""
+Token revocation checks.
+
+The ``token_blacklist`` tables are the source of truth for revoked tokens,
+but looking a JTI up in them on every authenticated request is a join over
+tables that only ever grow. Each worker process instead keeps the JTIs of
+unexpired blacklisted tokens in a bloom filter:
+
+* a JTI that is not in the filter is certainly not revoked, which is the
+  answer for almost every request and costs a few hashes;
+* a JTI that is in the filter is confirmed against the database, since the
+  filter has a small false-positive rate (``ERROR_RATE``).
+
+The filter is loaded on first use, picks up tokens revoked by other workers
+every ``REFRESH_INTERVAL`` seconds (one query on the blacklist primary key),
+and is rebuilt from unexpired tokens every ``REBUILD_INTERVAL`` seconds,
+which is how expired JTIs are dropped. Tokens revoked in this process are
+added straight away; other processes see them after at most
+``REFRESH_INTERVAL`` seconds.
+
+Blacklist ids are handed out when a row is inserted, not when it commits, so
+a slow transaction can commit an id below ones already read. Each refresh
+therefore reads again every id handed out in the last ``RESCAN_WINDOW``
+seconds; rows whose transaction took longer than that to commit are picked
+up by the next rebuild.
+"""
+
+import collections
+import hashlib
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import metrics
+from .utils import LRUCache
+
+
+DEFAULTS = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'REFRESH_INTERVAL': 5,
+    'REBUILD_INTERVAL': 60 * 60,
+    'RESCAN_WINDOW': 60,
+}
+
+checks = metrics.counter(
+    'api_token_revocation_checks_total',
+    'Token revocation checks.',
+)
+db_lookups = metrics.counter(
+    'api_token_revocation_db_lookups_total',
+    'Revocation checks that had to confirm a bloom filter hit in the database.',
+)
+false_positives = metrics.counter(
+    'api_token_revocation_false_positives_total',
+    'Bloom filter hits that turned out not to be revoked.',
+)
+entries = metrics.gauge(
+    'api_token_revocation_entries',
+    'Revoked JTIs held in this process\'s bloom filter.',
+)
+
+
+def get_revocation_settings():
+    """Return ``TOKEN_REVOCATION`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_REVOCATION', {})}
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        # Setting a bit is a read-modify-write of its byte
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """This process's view of the token blacklist."""
+
+    def __init__(self, options):
+        self.capacity = options['CAPACITY']
+        self.error_rate = options['ERROR_RATE']
+        self.refresh_interval = options['REFRESH_INTERVAL']
+        self.rebuild_interval = options['REBUILD_INTERVAL']
+        self.rescan_window = options['RESCAN_WINDOW']
+        self._filter = None
+        self._last_id = 0
+        # (monotonic time, last blacklist id read by then) for every sync
+        # in the last RESCAN_WINDOW seconds, plus the one just before
+        self._checkpoints = collections.deque()
+        self._built_at = 0
+        self._refreshed_at = 0
+        self._lock = threading.Lock()
+        # Probable hits already settled by a database lookup
+        self._revoked = LRUCache(max_entries=10000, ttl=self.rebuild_interval)
+        self._not_revoked = LRUCache(max_entries=10000, ttl=self.rebuild_interval)
+
+    def _sync_due(self):
+        now = time.monotonic()
+        return (
+            self._filter is None
+            or now - self._refreshed_at >= self.refresh_interval
+            or now - self._built_at >= self.rebuild_interval
+        )
+
+    def sync(self, force=False):
+        """Rebuild or refresh the filter if it is due."""
+        if not force and not self._sync_due():
+            return
+        # One thread syncs; the others keep using the current filter.
+        if not self._lock.acquire(blocking=self._filter is None):
+            return
+        try:
+            now = time.monotonic()
+            if (
+                force or self._filter is None
+                or now - self._built_at >= self.rebuild_interval
+                or self._filter.count >= self._filter.capacity
+            ):
+                self._rebuild()
+            elif now - self._refreshed_at >= self.refresh_interval:
+                self._refresh()
+        finally:
+            self._lock.release()
+
+    def _checkpoint(self, now):
+        """Record this sync and return the id to read again from."""
+        self._checkpoints.append((now, self._last_id))
+        while len(self._checkpoints) > 1 and now - self._checkpoints[1][0] >= self.rescan_window:
+            self._checkpoints.popleft()
+        return self._checkpoints[0][1]
+
+    def _rebuild(self):
+        last_id = BlacklistedToken.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        jtis = list(
+            BlacklistedToken.objects
+            .filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+        )
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+
+        self._filter = bloom
+        self._last_id = last_id
+        self._built_at = self._refreshed_at = time.monotonic()
+        self._checkpoint(self._built_at)
+        self._revoked.clear()
+        self._not_revoked.clear()
+        entries.set(bloom.count)
+
+    def _refresh(self):
+        now = time.monotonic()
+        rescan_from = self._checkpoint(now)
+        for blacklist_id, jti in (
+            BlacklistedToken.objects
+            .filter(id__gt=rescan_from)
+            .order_by('id')
+            .values_list('id', 'token__jti')
+        ):
+            # Rows in the rescan window are mostly in the filter already
+            if jti not in self._filter:
+                self._filter.add(jti)
+            self._not_revoked.delete(jti)
+            self._last_id = max(self._last_id, blacklist_id)
+        self._refreshed_at = now
+        entries.set(self._filter.count)
+
+    def _check_filter(self, jti):
+        """Return True or False when the filter or cache settles ``jti``, else None."""
+        checks.inc()
+        if jti not in self._filter:
+            return False
+        if self._revoked.get(jti):
+            return True
+        if self._not_revoked.get(jti):
+            return False
+        return None
+
+    def _confirm(self, jti):
+        db_lookups.inc()
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            self._revoked.set(jti, True)
+            return True
+        false_positives.inc()
+        self._not_revoked.set(jti, True)
+        return False
+
+    def is_revoked(self, jti):
+        """Return True if the token with ``jti`` has been blacklisted."""
+        self.sync()
+        revoked = self._check_filter(jti)
+        if revoked is None:
+            revoked = self._confirm(jti)
+        return revoked
+
+    async def ais_revoked(self, jti):
+        """Async version of is_revoked(); only leaves the event loop for the database."""
+        if self._sync_due():
+            await sync_to_async(self.sync)()
+        revoked = self._check_filter(jti)
+        if revoked is None:
+            revoked = await sync_to_async(self._confirm)(jti)
+        return revoked
+
+    def revoked_among(self, jtis):
+        """Return the blacklisted ones among ``jtis``, confirming filter hits in one query."""
+        self.sync()
+        revoked, unsettled = set(), []
+        for jti in jtis:
+            settled = self._check_filter(jti)
+            if settled is None:
+                unsettled.append(jti)
+            elif settled:
+                revoked.add(jti)
+        if unsettled:
+            db_lookups.inc(len(unsettled))
+            confirmed = set(
+                BlacklistedToken.objects
+                .filter(token__jti__in=unsettled)
+                .values_list('token__jti', flat=True)
+            )
+            for jti in unsettled:
+                if jti in confirmed:
+                    self._revoked.set(jti, True)
+                else:
+                    false_positives.inc()
+                    self._not_revoked.set(jti, True)
+            revoked |= confirmed
+        return revoked
+
+    def add(self, jti):
+        """Record a token revoked by this process."""
+        if self._filter is None:
+            # Loaded from the database on first use, which includes this JTI
+            return
+        self._filter.add(jti)
+        self._not_revoked.delete(jti)
+        self._revoked.set(jti, True)
+        entries.set(self._filter.count)
+
+
+_revocation_list = None
+_revocation_list_lock = threading.Lock()
+
+
+def get_revocation_list():
+    """Return this process's RevocationList."""
+    global _revocation_list
+    if _revocation_list is None:
+        with _revocation_list_lock:
+            if _revocation_list is None:
+                _revocation_list = RevocationList(get_revocation_settings())
+    return _revocation_list
+
+
+def is_revoked(jti):
+    """Return True if the token with ``jti`` has been blacklisted."""
+    return get_revocation_list().is_revoked(jti)
+
+
+async def ais_revoked(jti):
+    """Async version of is_revoked()."""
+    return await get_revocation_list().ais_revoked(jti)
+
+
+def revoked_among(jtis):
+    """Return the blacklisted JTIs among ``jtis``."""
+    return get_revocation_list().revoked_among(jtis)
+
+
+def revoke(token, user=None):
+    """
+    Blacklist any token, including access tokens.
+
+    Access tokens have no ``OutstandingToken`` row of their own, so one is
+    created here, the same way ``RefreshToken.blacklist()`` does.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, created = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            'user': user,
+            'token': str(token),
+            'expires_at': datetime_from_epoch(token['exp']),
+        },
+    )
+    blacklisted, created = BlacklistedToken.objects.get_or_create(token=outstanding)
+    get_revocation_list().add(jti)
+    return blacklisted
@@ -0,0 +1,136 @@
+"""
+Read-replica routing.
+
+``ReadReplicaRouter`` sends every write, and by default every read, to the
+``default`` (primary) database. Inside a view decorated with
+``@replica_reads`` reads go to the replica alias instead, when one is
+configured (``REPLICA_DATABASE_URL``).
+
+Replicas lag behind the primary, so a user who has just logged in, changed
+their password or verified their email could read their old row back.
+Saving a ``User`` or ``LoginAttempt`` therefore *pins* it (``user:<pk>``,
+``users``, ``email:<address>``) for ``STICKY_SECONDS``; see
+``api.signals``. A replica-read request that touches a pinned key, whether
+named by the view or found by authentication, reads from the primary for
+the rest of the request.
+
+Pins live in a Django cache. With the in-process cache each worker only
+sees its own pins, so use Redis (``REDIS_URL``) when running more than one.
+"""
+
+import asyncio
+import contextvars
+import functools
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+
+DEFAULTS = {
+    'ALIAS': 'replica',
+    # Longer than the replication lag we expect to see
+    'STICKY_SECONDS': 10,
+    'CACHE_ALIAS': 'default',
+}
+
+KEY_PREFIX = 'replica-pin'
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def get_replica_settings():
+    """Return ``READ_REPLICA`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'READ_REPLICA', {})}
+
+
+def replica_alias():
+    """The replica's database alias, or None when there is no replica."""
+    alias = get_replica_settings()['ALIAS']
+    return alias if alias in settings.DATABASES else None
+
+
+def _get_cache():
+    return caches[get_replica_settings()['CACHE_ALIAS']]
+
+
+def pin(*keys):
+    """Read ``keys`` from the primary for the next ``STICKY_SECONDS``."""
+    if replica_alias() is None:
+        return
+    _get_cache().set_many(
+        {f'{KEY_PREFIX}:{key}': 1 for key in keys},
+        get_replica_settings()['STICKY_SECONDS'],
+    )
+
+
+def check_pins(*keys):
+    """Switch the current request to the primary if any of ``keys`` is pinned."""
+    if _use_replica.get() and _get_cache().get_many([f'{KEY_PREFIX}:{key}' for key in keys]):
+        _use_replica.set(False)
+
+
+async def acheck_pins(*keys):
+    """Async version of check_pins()."""
+    if _use_replica.get() and await _get_cache().aget_many([f'{KEY_PREFIX}:{key}' for key in keys]):
+        _use_replica.set(False)
+
+
+def replica_reads(pinned_keys=None):
+    """
+    Let the decorated view read from the replica.
+
+    ``pinned_keys(request, *args, **kwargs)`` may name keys (see ``pin()``)
+    whose recent writes the response must reflect. Works on sync and async
+    views; put it above ``@api_view`` so authentication is covered too.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if replica_alias() is None:
+                    return await view(request, *args, **kwargs)
+                token = _use_replica.set(True)
+                try:
+                    if pinned_keys is not None:
+                        await acheck_pins(*pinned_keys(request, *args, **kwargs))
+                    return await view(request, *args, **kwargs)
+                finally:
+                    _use_replica.reset(token)
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if replica_alias() is None:
+                    return view(request, *args, **kwargs)
+                token = _use_replica.set(True)
+                try:
+                    if pinned_keys is not None:
+                        check_pins(*pinned_keys(request, *args, **kwargs))
+                    return view(request, *args, **kwargs)
+                finally:
+                    _use_replica.reset(token)
+        return wrapper
+    return decorator
+
+
+class ReadReplicaRouter:
+    """Route reads made inside ``@replica_reads`` views to the replica."""
+
+    # Revocations must take effect at once, whatever the replica lag
+    primary_only_apps = {'token_blacklist'}
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label not in self.primary_only_apps:
+            return replica_alias() or DEFAULT_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives the schema through replication
+        return db == DEFAULT_DB_ALIAS
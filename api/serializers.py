@@ -1,5 +1,12 @@
-from rest_framework import serializers
+from operator import attrgetter
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from . import instrumentation
 from .models import User, LoginAttempt
+from .utils import normalize_email
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,9 +21,105 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined', 'last_login_at']
 
 
+# Fields whose to_representation() returns model values unchanged
+_PASSTHROUGH_REPRESENTATIONS = {
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.BooleanField.to_representation,
+}
+
+_user_converter = None
+
+
+def _is_plain_iso_datetime(field):
+    """True for DateTimeFields rendered as ISO 8601 in the current timezone."""
+    return (
+        type(field).to_representation is serializers.DateTimeField.to_representation
+        and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601
+        and not hasattr(field, 'timezone')
+        and settings.USE_TZ
+    )
+
+
+def _build_user_converter():
+    """
+    Precompute a plain function producing ``UserSerializer(user).data``.
+    
+    Field introspection and the per-instance field copies DRF makes are done
+    once here. The returned ``convert(user, tz)`` only reads attributes, and
+    renders aware datetimes the way DateTimeField does but against a
+    timezone looked up once per call rather than once per value.
+    """
+    getters = []
+    for name, field in UserSerializer().fields.items():
+        if field.write_only:
+            continue
+        if type(field).to_representation in _PASSTHROUGH_REPRESENTATIONS:
+            kind = 'value'
+        elif _is_plain_iso_datetime(field):
+            kind = 'datetime'
+        else:
+            kind = 'field'
+        getters.append((name, attrgetter(field.source), kind, field.to_representation))
+    
+    def convert(user, tz):
+        data = {}
+        for name, get, kind, to_representation in getters:
+            value = get(user)
+            if value is None or kind == 'value':
+                pass
+            elif kind == 'datetime' and value.tzinfo is not None:
+                value = value.astimezone(tz).isoformat()
+                if value.endswith('+00:00'):
+                    value = value[:-6] + 'Z'
+            else:
+                value = to_representation(value)
+            data[name] = value
+        return data
+    
+    return convert
+
+
+def _get_user_converter():
+    global _user_converter
+    if _user_converter is None:
+        _user_converter = _build_user_converter()
+    return _user_converter
+
+
+def serialize_user(user):
+    """
+    Return the UserSerializer representation of ``user``.
+    
+    Uses the precomputed converter unless FAST_USER_SERIALIZER is False.
+    """
+    with instrumentation.timed('serialize'):
+        if not getattr(settings, 'FAST_USER_SERIALIZER', True):
+            return UserSerializer(user).data
+        return _get_user_converter()(user, timezone.get_current_timezone())
+
+
+def serialize_users(users):
+    """Return the UserSerializer representation of many users."""
+    with instrumentation.timed('serialize'):
+        if not getattr(settings, 'FAST_USER_SERIALIZER', True):
+            return UserSerializer(users, many=True).data
+        convert = _get_user_converter()
+        tz = timezone.get_current_timezone()
+        return [convert(user, tz) for user in users]
+
+
+class NormalizedEmailField(serializers.EmailField):
+    """Email field returning the address in its stored, lowercased form."""
+    
+    def to_internal_value(self, data):
+        return normalize_email(super().to_internal_value(data))
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     """Serializer for user registration."""
     
+    email = NormalizedEmailField(max_length=254)
     password = serializers.CharField(write_only=True, min_length=6)
     
     class Meta:
@@ -50,14 +153,26 @@ class RegisterSerializer(serializers.ModelSerializer):
 class LoginSerializer(serializers.Serializer):
     """Serializer for user login."""
     
-    email = serializers.EmailField()
+    email = NormalizedEmailField()
     password = serializers.CharField(write_only=True)
 
 
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for exchanging a refresh token."""
+    
+    refresh_token = serializers.CharField()
+
+
+class IntrospectionSerializer(serializers.Serializer):
+    """Serializer for a batch of tokens to introspect."""
+    
+    tokens = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+
+
 class VerifyEmailSerializer(serializers.Serializer):
     """Serializer for email verification."""
     
-    email = serializers.EmailField()
+    email = NormalizedEmailField()
     code = serializers.CharField(max_length=10)
 
 
@@ -77,6 +192,7 @@ class ChangePasswordSerializer(serializers.Serializer):
 class AdminCreateUserSerializer(serializers.ModelSerializer):
     """Serializer for admin creating a new user."""
     
+    email = NormalizedEmailField(max_length=254)
     password = serializers.CharField(write_only=True, min_length=6)
     
     class Meta:
@@ -102,6 +218,20 @@ class AdminCreateUserSerializer(serializers.ModelSerializer):
         return user
 
 
+class BulkCreateUserRowSerializer(serializers.Serializer):
+    """
+    Serializer for one row of an admin bulk user upload.
+    
+    Email uniqueness is checked for the whole upload at once by the view.
+    """
+    
+    email = NormalizedEmailField()
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    password = serializers.CharField(write_only=True, min_length=6)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, default='maintenance')
+
+
 class LoginAttemptSerializer(serializers.ModelSerializer):
     """Serializer for LoginAttempt model."""
     
@@ -114,12 +244,12 @@ class LoginAttemptSerializer(serializers.ModelSerializer):
 class RequestApprovalSerializer(serializers.Serializer):
     """Serializer for requesting admin approval."""
     
-    email = serializers.EmailField()
+    email = NormalizedEmailField()
 
 
 class ApproveUserSerializer(serializers.Serializer):
     """Serializer for admin approving a blocked user."""
     
-    email = serializers.EmailField()
+    email = NormalizedEmailField()
     admin_token = serializers.CharField(max_length=100)
 
@@ -0,0 +1,43 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .instrumentation import install_query_timer
+from .models import User, LoginAttempt
+from .response_cache import invalidate
+from .routers import pin
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_user_snapshot(sender, instance, **kwargs):
+    """Keep cached authentication snapshots in step with the users table."""
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user_responses(sender, instance, **kwargs):
+    """Expire cached /me and user listing responses that include this user."""
+    invalidate('users', f'user:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=LoginAttempt)
+def drop_cached_login_attempt_responses(sender, instance, **kwargs):
+    """Expire the cached login-attempts response for this email."""
+    invalidate(f'login_attempts:{instance.email}')
+
+
+@receiver([post_save, post_delete], sender=User)
+def pin_user_to_primary(sender, instance, **kwargs):
+    """Let reads of this user, and of the user listing, see the write despite replica lag."""
+    pin(f'user:{instance.pk}', 'users')
+
+
+@receiver([post_save, post_delete], sender=LoginAttempt)
+def pin_login_attempt_to_primary(sender, instance, **kwargs):
+    """Let reads of this email's login attempts see the write despite replica lag."""
+    pin(f'email:{instance.email}')
+
+
+# Time every SQL query made while handling a request
+connection_created.connect(install_query_timer, dispatch_uid='api.instrumentation.query_timer')
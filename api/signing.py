@@ -0,0 +1,190 @@
+"""
+JWT signing keys, key rotation and the JWKS document.
+
+By default tokens are signed with HS256 and ``SECRET_KEY``, so only this
+service can verify them. With ``JWT_SIGNING['ALGORITHM']`` set to ``RS256``
+or ``EdDSA`` (needs ``pip install cryptography``) they are signed with a
+private key instead, and the public keys are published at
+``/.well-known/jwks.json`` so other services can verify tokens themselves
+without calling this API.
+
+Every token names its key in the ``kid`` header. The id is the RFC 7638
+thumbprint of the public key, so it never needs configuring. Tokens verify
+against the signing key or any key in ``PUBLIC_KEYS``. Those extra keys
+are published and accepted but never used for signing. To rotate:
+
+1. Generate a key pair (``manage.py generate_jwt_key``) and add its public
+   key to ``PUBLIC_KEYS``. Consumers see the new key before any token
+   uses it.
+2. After ``JWKS_MAX_AGE``, make it the signing key and move the old public
+   key to ``PUBLIC_KEYS``.
+3. Remove the old public key once the tokens it signed have expired.
+
+Public keys may be RSA or Ed25519 whatever ``ALGORITHM`` is, so moving
+between RS256 and EdDSA is just another rotation. ``ACCEPT_HS256`` keeps
+HS256 tokens issued before switching valid, so sessions survive the switch.
+"""
+
+import base64
+import hashlib
+import json
+import re
+
+import jwt
+from django.core.exceptions import ImproperlyConfigured
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from jwt import InvalidAlgorithmError, InvalidKeyError, InvalidTokenError, algorithms
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+
+DEFAULTS = {
+    'ALGORITHM': 'HS256',
+    # PEM private key; required for RS256 and EdDSA
+    'PRIVATE_KEY': '',
+    # PEM public keys, concatenated, accepted and published besides the signing key
+    'PUBLIC_KEYS': '',
+    'ACCEPT_HS256': False,
+    'JWKS_MAX_AGE': 60 * 60,
+}
+
+ALGORITHMS = ('HS256', 'RS256', 'EdDSA')
+
+# Members that identify each key type, in the order RFC 7638 hashes them
+THUMBPRINT_MEMBERS = {
+    'RSA': ('e', 'kty', 'n'),
+    'OKP': ('crv', 'kty', 'x'),
+}
+
+PEM_BLOCK = re.compile(r'-----BEGIN [A-Z ]+-----.+?-----END [A-Z ]+-----', re.DOTALL)
+
+
+def get_signing_settings():
+    """Return ``JWT_SIGNING`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'JWT_SIGNING', {})}
+
+
+def key_id(jwk):
+    """RFC 7638 thumbprint of a public JWK, base64url without padding."""
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk['kty']]}
+    digest = hashlib.sha256(json.dumps(members, separators=(',', ':'), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def load_public_key(pem):
+    """``(algorithm, key)`` for a PEM public key; RSA keys verify RS256, Ed25519 keys EdDSA."""
+    for algorithm in ('RS256', 'EdDSA'):
+        try:
+            return algorithm, jwt.get_algorithm_by_name(algorithm).prepare_key(pem)
+        except (InvalidKeyError, ValueError):
+            continue
+    raise ImproperlyConfigured('JWT_PUBLIC_KEYS may only hold RSA and Ed25519 public keys.')
+
+
+class KeyRotatingTokenBackend(TokenBackend):
+    """
+    simplejwt ``TokenBackend`` that signs with one key, names it in the
+    ``kid`` header and verifies with whichever published key a token names.
+    """
+
+    def __init__(self, options):
+        super().__init__(
+            options['ALGORITHM'],
+            api_settings.SIGNING_KEY,
+            audience=api_settings.AUDIENCE,
+            issuer=api_settings.ISSUER,
+            leeway=api_settings.LEEWAY,
+            json_encoder=api_settings.JSON_ENCODER,
+        )
+        self.accept_hs256 = options['ACCEPT_HS256']
+        self.kid = None
+        self.verifying_keys = {}
+        self.jwks = []
+        if self.algorithm == 'HS256':
+            return
+
+        if not options['PRIVATE_KEY']:
+            raise ImproperlyConfigured(f'JWT_PRIVATE_KEY is required to sign tokens with {self.algorithm}.')
+        try:
+            self.signing_key = jwt.get_algorithm_by_name(self.algorithm).prepare_key(options['PRIVATE_KEY'])
+        except (InvalidKeyError, ValueError) as ex:
+            raise ImproperlyConfigured(f'JWT_PRIVATE_KEY is not a {self.algorithm} private key.') from ex
+        public_keys = [(self.algorithm, self.signing_key.public_key())]
+        public_keys += [load_public_key(pem) for pem in PEM_BLOCK.findall(options['PUBLIC_KEYS'])]
+        for algorithm, public_key in public_keys:
+            jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(public_key, as_dict=True)
+            kid = key_id(jwk)
+            if kid not in self.verifying_keys:
+                self.verifying_keys[kid] = (algorithm, public_key)
+                self.jwks.append({**jwk, 'kid': kid, 'alg': algorithm, 'use': 'sig'})
+        self.kid = self.jwks[0]['kid']
+
+    def _validate_algorithm(self, algorithm):
+        if algorithm not in ALGORITHMS:
+            raise TokenBackendError(f"Unrecognized algorithm type '{algorithm}'")
+        if algorithm != 'HS256' and not algorithms.has_crypto:
+            raise TokenBackendError(f'You must have cryptography installed to use {algorithm}.')
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+        return jwt.encode(
+            jwt_payload,
+            self.signing_key,
+            algorithm=self.algorithm,
+            headers={'kid': self.kid} if self.kid else None,
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            header = jwt.get_unverified_header(token)
+        except InvalidTokenError as ex:
+            raise TokenBackendError(_('Token is invalid or expired')) from ex
+
+        if self.algorithm == 'HS256' or (self.accept_hs256 and header.get('alg') == 'HS256'):
+            algorithm, key = 'HS256', api_settings.SIGNING_KEY
+        else:
+            # The key, and with it the algorithm, comes from our own list;
+            # the token only gets to pick which entry
+            algorithm, key = self.verifying_keys.get(header.get('kid'), (self.algorithm, None))
+            if key is None and verify:
+                raise TokenBackendError(_('Token is invalid or expired'))
+
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    'verify_aud': self.audience is not None,
+                    'verify_signature': verify,
+                },
+            )
+        except InvalidAlgorithmError as ex:
+            raise TokenBackendError(_('Invalid algorithm specified')) from ex
+        except InvalidTokenError as ex:
+            raise TokenBackendError(_('Token is invalid or expired')) from ex
+
+    def get_jwks(self):
+        """The JWKS document (RFC 7517) with every public key tokens may be verified with."""
+        return {'keys': self.jwks}
+
+
+_backend = None
+
+
+def get_token_backend():
+    """The token backend for ``JWT_SIGNING``, loaded on first use."""
+    global _backend
+    if _backend is None:
+        _backend = KeyRotatingTokenBackend(get_signing_settings())
+    return _backend
@@ -0,0 +1,297 @@
+import datetime
+import decimal
+import io
+import logging
+import threading
+import uuid
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from api import attempts as attempts_module
+from api import introspection, renderers, revocation
+from api.authentication import user_snapshots
+from api.management.commands import check_login_attempts, explain_hot_queries
+from api.management.commands.benchmark_serializers import build_users
+from api.models import User
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.serializers import UserSerializer, serialize_users
+
+
+@override_settings(
+    # These tests check accounting, not hashing or rate limits
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    PASSWORD_HASHING_POOL={**settings.PASSWORD_HASHING_POOL, 'WORKERS': 0},
+    RATE_LIMITS={**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False},
+)
+class LocMemAttemptConcurrencyTests(TransactionTestCase):
+    """
+    Parallel bad logins against one account: each failure is counted exactly
+    once and the account is blocked exactly once. ``manage.py
+    check_login_attempts`` runs the same checks at a larger scale and
+    reports the throughput.
+    """
+
+    backend = 'api.attempts.LocMemAttemptBackend'
+    requests = 60
+    concurrency = 8
+
+    def setUp(self):
+        cache.clear()
+        self.command = check_login_attempts.Command(stdout=io.StringIO())
+        # Every request is a 401 or 403; don't log them all
+        logger = logging.getLogger('django.request')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.ERROR)
+
+    def tearDown(self):
+        # use_backend() replaced the per-process instance
+        attempts_module._backend = None
+
+    def test_every_failure_is_counted_once(self):
+        self.assertEqual(self.command.check_counting(self.backend, self.requests, self.concurrency), [])
+
+    def test_account_is_blocked_once(self):
+        max_attempts = attempts_module.get_attempt_settings()['MAX_ATTEMPTS']
+        self.assertEqual(
+            self.command.check_blocking(self.backend, max_attempts, self.requests, self.concurrency), [],
+        )
+
+
+class CacheAttemptConcurrencyTests(LocMemAttemptConcurrencyTests):
+    backend = 'api.attempts.CacheAttemptBackend'
+
+
+class DatabaseAttemptConcurrencyTests(LocMemAttemptConcurrencyTests):
+    backend = 'api.attempts.DatabaseAttemptBackend'
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    The queries on the request path read an index, not the whole table.
+    ``manage.py explain_hot_queries --verbose-plans`` prints the plans.
+    """
+
+    def test_hot_queries_use_an_index(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest(f'Plans cannot be checked on {connection.vendor}.')
+        for description, queryset, indexes in explain_hot_queries.hot_queries():
+            with self.subTest(description):
+                plan, problem = explain_hot_queries.check_plan(queryset, indexes)
+                self.assertIsNone(problem, plan)
+
+
+class FastPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = 1000
+
+
+token_settings = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    PASSWORD_HASHING_POOL={**settings.PASSWORD_HASHING_POOL, 'WORKERS': 0},
+    RATE_LIMITS={**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False},
+    TOKEN_INTROSPECTION={**getattr(settings, 'TOKEN_INTROSPECTION', {}), 'API_KEYS': ['test-key']},
+)
+
+
+class TokenTestMixin:
+    """A verified user, and helpers to log in, refresh and introspect."""
+
+    email = 'rotation@example.com'
+    password = 'Secret#123'
+
+    def setUp(self):
+        # Per-process caches outlive the rolled-back rows of other tests
+        cache.clear()
+        user_snapshots.clear()
+        introspection.results.clear()
+        revocation._revocation_list = None
+        self.user = User.objects.create_user(
+            email=self.email, password=self.password,
+            first_name='Rota', last_name='Tion', is_email_verified=True,
+        )
+
+    def login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'email': self.email, 'password': self.password},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def refresh(self, refresh_token):
+        return self.client.post(
+            '/api/auth/refresh/', {'refresh_token': refresh_token}, content_type='application/json',
+        )
+
+    def introspect(self, token):
+        response = self.client.post(
+            '/api/auth/introspect/', {'tokens': [token]}, content_type='application/json',
+            HTTP_X_API_KEY='test-key',
+        )
+        return response.json()['results'][0]
+
+
+@token_settings
+class RefreshTokenTests(TokenTestMixin, TestCase):
+    """Refresh token rotation, logout, and the sessions a password change ends."""
+
+    def test_rehash_on_login_keeps_other_sessions(self):
+        phone = self.login()
+        # A new hasher profile: the next login rehashes the password
+        with override_settings(PASSWORD_HASHERS=[
+            'api.tests.FastPBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher',
+        ]):
+            laptop = self.login()
+        self.assertTrue(User.objects.get(pk=self.user.pk).password.startswith('pbkdf2_sha256$1000$'))
+
+        self.assertTrue(self.introspect(phone['token'])['active'])
+        self.assertEqual(self.refresh(phone['refresh_token']).status_code, 200)
+        self.assertEqual(self.refresh(laptop['refresh_token']).status_code, 200)
+
+    def test_rotated_token_is_refused_on_reuse(self):
+        first = self.login()['refresh_token']
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, 200, response.content)
+        second = response.json()['refresh_token']
+        self.assertNotEqual(second, first)
+
+        self.assertEqual(self.refresh(first).status_code, 401)
+        # The replacement keeps working, once
+        self.assertEqual(self.refresh(second).status_code, 200)
+        self.assertEqual(self.refresh(second).status_code, 401)
+
+    def test_password_change_ends_the_chain(self):
+        tokens = self.login()
+        rotated = self.refresh(tokens['refresh_token']).json()
+        response = self.client.post(
+            '/api/auth/change-password/',
+            {'current_password': self.password, 'new_password': 'Changed#456'},
+            content_type='application/json', HTTP_AUTHORIZATION=f"Bearer {rotated['token']}",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(self.refresh(rotated['refresh_token']).status_code, 401)
+        self.assertEqual(self.introspect(rotated['token']), {'active': False, 'reason': 'password_changed'})
+        # Sessions started with the new password are not affected
+        self.password = 'Changed#456'
+        self.assertEqual(self.refresh(self.login()['refresh_token']).status_code, 200)
+
+    def test_logout_blacklists_the_tokens(self):
+        tokens = self.login()
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh_token': tokens['refresh_token']},
+            content_type='application/json', HTTP_AUTHORIZATION=f"Bearer {tokens['token']}",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+        self.assertEqual(self.refresh(tokens['refresh_token']).status_code, 401)
+        self.assertEqual(
+            self.client.get('/api/auth/me/', HTTP_AUTHORIZATION=f"Bearer {tokens['token']}").status_code, 401,
+        )
+        self.assertEqual(self.introspect(tokens['token']), {'active': False, 'reason': 'revoked'})
+
+
+@token_settings
+class ConcurrentRefreshTests(TokenTestMixin, TransactionTestCase):
+    """A refresh token sent by several requests at once is exchanged only once."""
+
+    requests = 8
+
+    def setUp(self):
+        super().setUp()
+        # The losers are 401s; don't log them
+        logger = logging.getLogger('django.request')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.ERROR)
+
+    def test_only_one_concurrent_reuse_wins(self):
+        refresh_token = self.login()['refresh_token']
+        statuses = []
+        barrier = threading.Barrier(self.requests)
+
+        def worker():
+            client = Client()
+            try:
+                barrier.wait()
+                response = client.post(
+                    '/api/auth/refresh/', {'refresh_token': refresh_token}, content_type='application/json',
+                )
+                statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.requests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(statuses), [200] + [401] * (self.requests - 1))
+
+
+@skipUnless(renderers.fast_json_enabled(), 'orjson is not installed or FAST_JSON is off.')
+class FastJSONTests(SimpleTestCase):
+    """
+    FastJSONRenderer and FastJSONParser (orjson) give exactly what DRF's
+    JSONRenderer and JSONParser give. ``manage.py benchmark_json`` times them.
+    """
+
+    def edge_cases(self, users, now):
+        """Payloads that exercise every type and escape the renderers treat differently."""
+        return {
+            'users': {'success': True, 'users': serialize_users(users[:50]), 'next_cursor': None},
+            'UserSerializer': UserSerializer(users[:5], many=True).data,
+            'unicode': {'name': 'Wanjirũ Ōtieno 😀', 'separators': 'a\u2028b\u2029c', 'control': '\x00\x1f"\\/\t'},
+            'dates': {
+                'aware': now, 'utc': now.astimezone(datetime.timezone.utc),
+                'naive': datetime.datetime(2024, 1, 2, 3, 4, 5, 678901), 'date': now.date(),
+                'time': datetime.time(12, 30, 45, 123456), 'timedelta': datetime.timedelta(minutes=20),
+            },
+            'other types': {
+                'decimal': decimal.Decimal('1.10'), 'uuid': uuid.UUID(int=12345), 'lazy': _('Token is invalid or expired'),
+                'bytes': b'raw', 'tuple': (1, 2), 'generator': (n for n in range(3)), 'set': {'only'},
+            },
+            'errors': {'email': [ErrorDetail('Enter a valid email address.', code='invalid')]},
+            'numbers': [0, -1, 2 ** 63 - 1, 0.1, 1.5, -2.25, 123456.789, True, False, None],
+            'big int': {'value': 2 ** 70},
+            'int keys': {1: 'one', 2: 'two'},
+            'empty': [{}, [], ''],
+        }
+
+    def test_renders_the_same_bytes(self):
+        users = build_users(100)
+        now = timezone.now()
+        # Fresh payloads for each renderer: generators can only be consumed once
+        expected = {label: JSONRenderer().render(data) for label, data in self.edge_cases(users, now).items()}
+        for label, data in self.edge_cases(users, now).items():
+            with self.subTest(label):
+                self.assertEqual(FastJSONRenderer().render(data), expected[label])
+
+    def test_parses_the_same_values_and_errors(self):
+        bodies = [
+            b'{"email":"a@example.com","password":"Secret#123"}',
+            '{"name":"Wanjirũ 😀","escaped":"\\u00e9\\ud83d\\ude00\\n"}'.encode(),
+            b'{"nested":[1,2.5,-3e2,true,false,null,{"a":[]}],"a":1,"a":2}',
+            b'{"big":123456789012345678,"huge":1e400,"lone":"\\ud800"}',
+            b'{"unterminated":', b'{"a":NaN}', b'[1,]', b'', b'\xff\xfe',
+        ]
+        for body in bodies:
+            with self.subTest(body=body[:60]):
+                results = []
+                for parser in (JSONParser(), FastJSONParser()):
+                    try:
+                        results.append(('ok', parser.parse(io.BytesIO(body))))
+                    except ParseError as exc:
+                        results.append(('error', str(exc.detail)))
+                self.assertEqual(results[1], results[0])
@@ -0,0 +1,214 @@
+"""
+Rate limits for the unauthenticated endpoints.
+
+Every ``AllowAny`` endpoint that touches the database or hashes a password
+is limited per client IP and, where the request names an account, per email.
+Limits are checked before the view body runs, so rejected requests cost a
+couple of cache operations and no queries or hashing.
+
+Each limit is a sliding window counter: requests are counted per fixed
+window in a Django cache, and a request is weighed against the current
+window's count plus the previous window's count scaled by how much of it
+still falls inside the sliding window. That takes one ``incr`` and one
+``get`` per limit and stays within a few percent of an exact sliding log.
+With Redis (``REDIS_URL``) the counters are shared between workers;
+otherwise each worker enforces the limits on its own.
+
+Limits are configured per view scope in ``RATE_LIMITS['RATES']``::
+
+    'login': {'ip': '30/min', 'email': '10/min'}
+
+Rates are ``<requests>/<period>``, where the period is ``s``, ``min``,
+``hour`` or ``day``, optionally with a multiplier (``100/15min``). Responses
+carry ``X-RateLimit-Limit``, ``X-RateLimit-Remaining`` and
+``X-RateLimit-Reset`` for the tightest limit (see
+``api.middleware.RateLimitHeadersMiddleware``); rejected requests get a 429
+with ``Retry-After``.
+
+Client IPs come from DRF's ``get_ident()``, so set ``NUM_PROXIES`` to the
+number of proxies in front of the app or clients can pick their own IP with
+``X-Forwarded-For``.
+"""
+
+import hashlib
+import math
+import re
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'RATES': {},
+}
+
+KEY_PREFIX = 'rate-limit'
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 60 * 60, 'hour': 60 * 60,
+    'd': 24 * 60 * 60, 'day': 24 * 60 * 60,
+}
+
+RATE_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+)\s*$')
+
+Usage = namedtuple('Usage', ['allowed', 'limit', 'remaining', 'reset', 'wait'])
+
+
+def get_rate_limit_settings():
+    """Return ``RATE_LIMITS`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'RATE_LIMITS', {})}
+
+
+def parse_rate(rate):
+    """Turn ``'10/min'`` or ``'100/15min'`` into ``(requests, window_seconds)``."""
+    match = RATE_PATTERN.match(rate.lower())
+    if not match or match.group(3) not in PERIODS:
+        raise ValueError(f'Invalid rate {rate!r}')
+    requests, multiplier, period = match.groups()
+    return int(requests), int(multiplier or 1) * PERIODS[period]
+
+
+def _make_key(scope, kind, ident, window, index):
+    # Hashed so emails and forwarded-for headers are always valid cache keys
+    digest = hashlib.blake2b(ident.encode(), digest_size=16).hexdigest()
+    return f'{KEY_PREFIX}:{scope}:{kind}:{window}:{digest}:{index}'
+
+
+def _incr(cache, key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # First request of the window
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def _wait(limit, window, current, previous, elapsed):
+    """Seconds until the sliding window estimate drops back under ``limit``."""
+    if current < limit and previous:
+        # Still this window: previous * (1 - (elapsed + t) / window) + current < limit
+        return max(window * (1 - (limit - current) / previous) - elapsed, 0)
+    # Next window, where this window's count becomes the scaled one
+    return (window - elapsed) + window * max(1 - limit / max(current, 1), 0)
+
+
+def hit(scope, kind, ident, rate, now=None):
+    """Count one request by ``ident`` against a limit and return its ``Usage``."""
+    limit, window = parse_rate(rate)
+    cache = caches[get_rate_limit_settings()['CACHE_ALIAS']]
+    now = time.time() if now is None else now
+    index = int(now // window)
+    elapsed = now - index * window
+
+    current_key = _make_key(scope, kind, ident, window, index)
+    # Kept through the next window, where it is the previous count
+    current = _incr(cache, current_key, 2 * window + 1)
+    previous = cache.get(_make_key(scope, kind, ident, window, index - 1), 0)
+
+    estimate = previous * (1 - elapsed / window) + current
+    reset = math.ceil(window - elapsed)
+    if estimate <= limit:
+        return Usage(True, limit, int(limit - estimate), reset, 0)
+
+    # Rejected requests do not use up quota
+    try:
+        cache.decr(current_key)
+    except ValueError:
+        pass
+    current -= 1
+    metrics.counter(
+        'api_rate_limited_total',
+        'Requests rejected by a rate limit, by scope and key.',
+        labels={'scope': scope, 'key': kind},
+    ).inc()
+    return Usage(False, limit, 0, reset, math.ceil(_wait(limit, window, current, previous, elapsed)))
+
+
+def get_client_ip(request):
+    """The client IP, honouring ``NUM_PROXIES`` like DRF's throttles do."""
+    return BaseThrottle().get_ident(request)
+
+
+def check(scope, request, email=None):
+    """
+    Count ``request`` against every limit configured for ``scope``.
+
+    Returns the usage of the tightest limit, or of the first one that
+    rejected the request, or None when nothing limits ``scope``. The usage
+    is also stored on the Django request for the response headers.
+    """
+    options = get_rate_limit_settings()
+    rates = options['RATES'].get(scope)
+    if not options['ENABLED'] or not rates:
+        return None
+
+    idents = {'ip': get_client_ip(request)}
+    if email:
+        idents['email'] = email.strip().lower()
+
+    tightest = None
+    for kind, rate in rates.items():
+        if kind not in idents:
+            continue
+        usage = hit(scope, kind, idents[kind], rate)
+        if tightest is None or not usage.allowed or usage.remaining < tightest.remaining:
+            tightest = usage
+        if not usage.allowed:
+            break
+    getattr(request, '_request', request).rate_limit = tightest
+    return tightest
+
+
+async def acheck(scope, request, email=None):
+    """Async version of check(), raising ``Throttled`` when over a limit."""
+    usage = await sync_to_async(check)(scope, request, email)
+    if usage is not None and not usage.allowed:
+        raise Throttled(wait=usage.wait)
+    return usage
+
+
+def _request_email(request, view):
+    email = view.kwargs.get('email')
+    if email is None and request.method == 'POST':
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+    return email if isinstance(email, str) else None
+
+
+class SlidingWindowRateThrottle(BaseThrottle):
+    """
+    DRF throttle applying ``RATE_LIMITS['RATES'][scope]``.
+
+    Subclasses set ``scope``; use ``rate_limit(scope)`` to get one for
+    ``@throttle_classes``.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.usage = None
+
+    def allow_request(self, request, view):
+        self.usage = check(self.scope, request, _request_email(request, view))
+        return self.usage is None or self.usage.allowed
+
+    def wait(self):
+        return self.usage.wait if self.usage is not None else None
+
+
+def rate_limit(scope):
+    """Throttle classes for ``scope``: ``@throttle_classes(rate_limit('login'))``."""
+    name = ''.join(part.title() for part in scope.split('_')) + 'RateThrottle'
+    return [type(name, (SlidingWindowRateThrottle,), {'scope': scope})]
@@ -0,0 +1,57 @@
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import revocation, signing
+
+
+def password_stamp(user):
+    """
+    The ``REVOKE_TOKEN_CLAIM`` value for ``user``.
+
+    Changes when the password is changed, but not when login upgrades its
+    hash to a new hasher profile, so tuning the hasher keeps every session.
+    """
+    changed = user.password_changed_at.isoformat() if user.password_changed_at else ''
+    return salted_hmac('api.tokens.password_stamp', f'{user.pk}:{changed}').hexdigest()[:32]
+
+
+def password_unchanged(claim, user):
+    """True if a token carrying ``claim`` was issued since the user's last password change."""
+    # Tokens issued before password_stamp() carry a digest of the password
+    # hash; they stay valid until it changes, like they used to
+    return claim is not None and claim in (password_stamp(user), get_md5_hash_password(user.password))
+
+
+class AccessToken(tokens.AccessToken):
+    """simplejwt's AccessToken signed and verified with the keys in api.signing."""
+
+    def get_token_backend(self):
+        return signing.get_token_backend()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    simplejwt's RefreshToken with blacklist checks served by api.revocation.
+
+    Verifying a token consults this process's revocation filter instead of
+    querying the blacklist, and blacklisting adds the token to the filter
+    immediately. Signed with the keys in api.signing, like AccessToken.
+    """
+
+    access_token_class = AccessToken
+
+    def get_token_backend(self):
+        return signing.get_token_backend()
+
+    def check_blacklist(self):
+        if revocation.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        revocation.get_revocation_list().add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
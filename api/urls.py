@@ -1,22 +1,33 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    # Native async authentication endpoints for ASGI deployments
+    from . import async_views as auth_views
+else:
+    auth_views = views
+
 urlpatterns = [
     # Health check
     path('health/', views.health_check, name='health-check'),
+    path('metrics/', views.prometheus_metrics, name='metrics'),
     
     # Authentication endpoints
-    path('auth/register/', views.register, name='register'),
-    path('auth/verify-email/', views.verify_email, name='verify-email'),
-    path('auth/login/', views.login, name='login'),
-    path('auth/me/', views.get_current_user, name='me'),
-    path('auth/logout/', views.logout, name='logout'),
-    path('auth/change-password/', views.change_password, name='change-password'),
+    path('auth/register/', auth_views.register, name='register'),
+    path('auth/verify-email/', auth_views.verify_email, name='verify-email'),
+    path('auth/login/', auth_views.login, name='login'),
+    path('auth/me/', auth_views.get_current_user, name='me'),
+    path('auth/logout/', auth_views.logout, name='logout'),
+    path('auth/refresh/', views.refresh_token, name='token-refresh'),
+    path('auth/introspect/', views.introspect_tokens, name='token-introspect'),
+    path('auth/change-password/', auth_views.change_password, name='change-password'),
     
     # Admin endpoints
     path('admin/setup/', views.setup_admin, name='admin-setup'),  # One-time admin creation
     path('admin/users/', views.get_all_users, name='admin-users'),
     path('admin/create-user/', views.admin_create_user, name='admin-create-user'),
+    path('admin/bulk-create-users/', views.admin_bulk_create_users, name='admin-bulk-create-users'),
     path('admin/approve-user/', views.approve_user, name='approve-user'),
     
     # Login attempt endpoints
@@ -1,5 +1,8 @@
 import random
 import string
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from django.utils import timezone
 
@@ -17,7 +20,79 @@ def generate_admin_token():
     return f"admin_{timestamp}_{random_string}"
 
 
+def normalize_email(email):
+    """
+    Return the form every email is stored and looked up in.
+    
+    Lowercased as a whole, so lookups can use the unique index on ``email``
+    with a plain ``=`` and still ignore the case clients typed.
+    """
+    return email.strip().lower()
+
+
 def get_verification_code_expiry(minutes=15):
     """Get expiry time for verification code."""
     return timezone.now() + timedelta(minutes=minutes)
 
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU mapping with optional per-entry expiry.
+    """
+
+    def __init__(self, max_entries=1000, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expiry(self, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        return time.monotonic() + ttl if ttl else None
+
+    def _get_entry(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _store(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._get_entry(key)
+            return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, self._expiry(ttl))
+
+    def incr(self, key, delta=1, ttl=None):
+        """Atomically add ``delta`` to an integer entry, keeping its expiry."""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                value, expires_at = delta, self._expiry(ttl)
+            else:
+                value, expires_at = entry[0] + delta, entry[1]
+            self._store(key, value, expires_at)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
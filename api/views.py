@@ -1,23 +1,52 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view, authentication_classes, parser_classes, permission_classes, throttle_classes,
+)
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
-from django.contrib.auth.hashers import check_password
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.conf import settings
 from datetime import timedelta
+import json
 
+from . import hashing, introspection, mail, metrics, pagination, revocation, routers, signing, write_behind
 from .models import User, LoginAttempt
 from .serializers import (
-    UserSerializer, RegisterSerializer, LoginSerializer,
+    UserSerializer, RegisterSerializer, LoginSerializer, RefreshTokenSerializer, IntrospectionSerializer,
     VerifyEmailSerializer, ChangePasswordSerializer,
-    AdminCreateUserSerializer, LoginAttemptSerializer,
-    RequestApprovalSerializer, ApproveUserSerializer
+    AdminCreateUserSerializer, BulkCreateUserRowSerializer,
+    LoginAttemptSerializer, RequestApprovalSerializer, ApproveUserSerializer,
+    serialize_user, serialize_users
+)
+from .attempts import get_attempt_backend, get_attempt_settings
+from .authentication import CachedJWTAuthentication, MetricsTokenAuthentication
+from .exceptions import HashingUnavailable
+from .parsers import CSVParser, FastJSONParser
+from .permissions import HasIntrospectionKey, HasMetricsToken, IsAdmin
+from .response_cache import cache_response, invalidate, make_etag
+from .throttling import rate_limit
+from .tokens import RefreshToken, password_stamp, password_unchanged
+from .utils import (
+    generate_verification_code, generate_admin_token, get_verification_code_expiry,
+    normalize_email
 )
-from .permissions import IsAdmin
-from .utils import generate_verification_code, generate_admin_token, get_verification_code_expiry
+
+
+# Each row costs one password hash (about 0.3s per HASHING_BATCH_IN_FLIGHT
+# with the default hasher), so 100 rows stay within a normal request budget
+# even on one CPU. Rows are hashed and saved in groups, so a late failure
+# only loses the rows not saved yet.
+BULK_CREATE_MAX_ROWS = 100
+BULK_CREATE_BATCH_SIZE = 25
 
 
 def get_tokens_for_user(user):
@@ -28,6 +57,9 @@ def get_tokens_for_user(user):
     refresh['email'] = user.email
     refresh['role'] = user.role
     
+    # Lets refresh_token() turn refresh tokens down once the password changes
+    refresh[jwt_settings.REVOKE_TOKEN_CLAIM] = password_stamp(user)
+    
     # Set token expiration based on user role
     if user.email == settings.ADMIN_EMAIL:
         # Admin gets 1 year token
@@ -48,6 +80,7 @@ def get_tokens_for_user(user):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limit('register'))
 def register(request):
     """
     POST /api/auth/register/
@@ -62,16 +95,15 @@ def register(request):
         verification_code = generate_verification_code()
         user.verification_code = verification_code
         user.verification_code_expiry = get_verification_code_expiry()
-        user.save()
+        user.save(update_fields=['verification_code', 'verification_code_expiry'])
         
-        # TODO: Send verification email
-        # For now, we'll just return the code in development
-        # In production, send email via SendGrid/Mailgun
+        # Queued for `manage.py send_queued_mail`; never waits on SMTP
+        mail.enqueue(**mail.verification_email(user, verification_code))
         
         return Response({
             'success': True,
             'message': 'User registered successfully. Please verify your email.',
-            'user': UserSerializer(user).data,
+            'user': serialize_user(user),
             # Remove this in production - only for development
             'verification_code': verification_code if settings.DEBUG else None
         }, status=status.HTTP_201_CREATED)
@@ -92,6 +124,7 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limit('verify_email'))
 def verify_email(request):
     """
     POST /api/auth/verify-email/
@@ -141,7 +174,7 @@ def verify_email(request):
     user.is_email_verified = True
     user.verification_code = None
     user.verification_code_expiry = None
-    user.save()
+    user.save(update_fields=['is_email_verified', 'verification_code', 'verification_code_expiry'])
     
     return Response({
         'success': True,
@@ -151,6 +184,7 @@ def verify_email(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limit('login'))
 def login(request):
     """
     POST /api/auth/login/
@@ -183,26 +217,34 @@ def login(request):
             'message': 'Please verify your email before logging in.'
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    # Get or create login attempt record
-    login_attempt, created = LoginAttempt.objects.get_or_create(email=email)
+    attempts = get_attempt_backend()
+    max_attempts = get_attempt_settings()['MAX_ATTEMPTS']
+    
+    # Unless counters live in the database, a LoginAttempt row only exists
+    # once an account has been blocked
+    login_attempt = LoginAttempt.objects.filter(email=email).first()
     
     # Check if account is blocked
-    if login_attempt.blocked and not login_attempt.admin_approved:
+    if login_attempt and login_attempt.blocked and not login_attempt.admin_approved:
         return Response({
             'success': False,
             'message': 'Account is blocked due to too many failed login attempts. Please contact admin for approval.'
         }, status=status.HTTP_403_FORBIDDEN)
     
     # Verify password
-    if check_password(password, user.password):
+    if hashing.check_password(password, user.password):
         # Password is correct - reset login attempts
-        login_attempt.attempts = 0
-        login_attempt.blocked = False
-        login_attempt.save()
+        attempts.reset(email)
         
-        # Update last login time
+        # Upgrade hashes made with an outdated hasher profile while the
+        # plain password is at hand
+        if hashing.needs_rehash(user.password):
+            user.password = hashing.make_password(password)
+            user.save(update_fields=['password'])
+        
+        # Update last login time; written in batches (api/write_behind.py)
         user.last_login_at = timezone.now()
-        user.save()
+        write_behind.last_login.touch(user.pk, user.last_login_at)
         
         # Generate JWT token
         tokens = get_tokens_for_user(user)
@@ -211,33 +253,33 @@ def login(request):
             'success': True,
             'message': 'Login successful',
             'token': tokens['token'],
-            'user': UserSerializer(user).data
+            'refresh_token': tokens['refresh'],
+            'user': serialize_user(user)
         }, status=status.HTTP_200_OK)
     
     else:
         # Password is incorrect - increment attempts
-        login_attempt.attempts += 1
-        remaining_attempts = 5 - login_attempt.attempts
+        failed_attempts = attempts.increment(email)
+        remaining_attempts = max_attempts - failed_attempts
         
-        # Block if attempts >= 5
-        if login_attempt.attempts >= 5:
-            login_attempt.blocked = True
-            login_attempt.save()
+        # Block once the limit is reached
+        if failed_attempts >= max_attempts:
+            attempts.block(email, failed_attempts)
             return Response({
                 'success': False,
                 'message': 'Account is blocked due to too many failed login attempts. Please contact admin for approval.'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        login_attempt.save()
-        
         return Response({
             'success': False,
             'message': f'Invalid credentials. {remaining_attempts} attempts remaining.'
         }, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@routers.replica_reads()
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response(lambda request: [f'user:{request.user.pk}'], scope='user')
 def get_current_user(request):
     """
     GET /api/auth/me/
@@ -246,7 +288,7 @@ def get_current_user(request):
     user = request.user
     return Response({
         'success': True,
-        'user': UserSerializer(user).data
+        'user': serialize_user(user)
     }, status=status.HTTP_200_OK)
 
 
@@ -258,6 +300,9 @@ def logout(request):
     Logout user (token blacklisting).
     """
     try:
+        # Revoke the access token used for this request
+        revocation.revoke(request.auth, user=request.user)
+        
         # Get the refresh token from request
         refresh_token = request.data.get('refresh_token')
         
@@ -277,6 +322,103 @@ def logout(request):
         }, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes(rate_limit('refresh'))
+def refresh_token(request):
+    """
+    POST /api/auth/refresh/
+    Exchange a refresh token for a new access token and refresh token.
+    
+    Each refresh token works once: with BLACKLIST_AFTER_ROTATION it is
+    blacklisted here, so a stolen token that gets replayed after the
+    owner has used it is refused.
+    """
+    serializer = RefreshTokenSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Invalid data provided.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    invalid = Response({
+        'success': False,
+        'message': 'Invalid or expired refresh token. Please log in again.'
+    }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    # Checks the signature, expiry and blacklist
+    try:
+        refresh = RefreshToken(serializer.validated_data['refresh_token'])
+    except TokenError:
+        return invalid
+    
+    try:
+        user = User.objects.get(**{jwt_settings.USER_ID_FIELD: refresh[jwt_settings.USER_ID_CLAIM]})
+    except (KeyError, User.DoesNotExist):
+        return invalid
+    
+    if not user.is_active or not password_unchanged(refresh.get(jwt_settings.REVOKE_TOKEN_CLAIM), user):
+        return invalid
+    
+    if not jwt_settings.ROTATE_REFRESH_TOKENS:
+        return Response({
+            'success': True,
+            'token': str(refresh.access_token),
+            'refresh_token': str(refresh)
+        }, status=status.HTTP_200_OK)
+    
+    if jwt_settings.BLACKLIST_AFTER_ROTATION:
+        # The unique constraint settles concurrent uses of the same token:
+        # only one request gets to blacklist it
+        blacklisted, created = refresh.blacklist()
+        if not created:
+            return invalid
+    
+    # New tokens carry the user's current role and a fresh lifetime
+    tokens = get_tokens_for_user(user)
+    
+    return Response({
+        'success': True,
+        'token': tokens['token'],
+        'refresh_token': tokens['refresh']
+    }, status=status.HTTP_200_OK)
+
+
+@routers.replica_reads()
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([HasIntrospectionKey])
+def introspect_tokens(request):
+    """
+    POST /api/auth/introspect/
+    Check a batch of tokens for services that cannot verify them locally.
+    Callers authenticate with an X-API-Key from TOKEN_INTROSPECTION.
+    
+    Returns one result per token, in order (see api/introspection.py).
+    """
+    serializer = IntrospectionSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Invalid data provided.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    raw_tokens = serializer.validated_data['tokens']
+    max_tokens = introspection.get_introspection_settings()['MAX_TOKENS']
+    if len(raw_tokens) > max_tokens:
+        return Response({
+            'success': False,
+            'message': f'At most {max_tokens} tokens per request.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'results': introspection.introspect(raw_tokens)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -297,15 +439,16 @@ def change_password(request):
     new_password = serializer.validated_data['new_password']
     
     # Check current password
-    if not check_password(current_password, user.password):
+    if not hashing.check_password(current_password, user.password):
         return Response({
             'success': False,
             'message': 'Current password is incorrect.'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Set new password
-    user.set_password(new_password)
-    user.save()
+    # Set new password; ends every refresh token issued before now
+    user.password = hashing.make_password(new_password)
+    user.password_changed_at = timezone.now()
+    user.save(update_fields=['password', 'password_changed_at'])
     
     return Response({
         'success': True,
@@ -317,20 +460,79 @@ def change_password(request):
 # ADMIN ENDPOINTS
 # ============================================================================
 
+@routers.replica_reads(lambda request: ['users'])
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cache_response(lambda request: ['users'], scope='role')
 def get_all_users(request):
     """
     GET /api/admin/users/
-    Get all users (Admin only).
+    Get users page by page (Admin only).
+    
+    Query parameters:
+        role               - only users with this role
+        is_email_verified  - "true" or "false"
+        limit              - page size (default 100, max 500)
+        cursor             - next_cursor from the previous page
+        stream             - "true" to stream every matching user as NDJSON
     """
-    users = User.objects.all()
+    users = User.objects.only(*UserSerializer.Meta.fields)
+    
+    role = request.query_params.get('role')
+    if role:
+        if role not in dict(User.ROLE_CHOICES):
+            return Response({
+                'success': False,
+                'message': 'Invalid role.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        users = users.filter(role=role)
+    
+    is_email_verified = request.query_params.get('is_email_verified')
+    if is_email_verified is not None:
+        if is_email_verified.lower() not in ('true', 'false', '1', '0'):
+            return Response({
+                'success': False,
+                'message': 'is_email_verified must be true or false.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        users = users.filter(is_email_verified=is_email_verified.lower() in ('true', '1'))
+    
+    cursor = request.query_params.get('cursor')
+    try:
+        if request.query_params.get('stream', '').lower() in ('true', '1'):
+            # The stream is read after the view returns; keep it on the
+            # database chosen for this request
+            users = users.order_by(*pagination.ORDERING).using(users.db)
+            if cursor:
+                users = pagination.after_cursor(users, cursor)
+            return StreamingHttpResponse(
+                stream_users_ndjson(users),
+                content_type='application/x-ndjson'
+            )
+        
+        page, next_cursor = pagination.paginate(
+            users,
+            cursor=cursor,
+            page_size=pagination.get_page_size(request.query_params.get('limit'))
+        )
+    except pagination.InvalidCursor:
+        return Response({
+            'success': False,
+            'message': 'Invalid cursor.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     return Response({
         'success': True,
-        'users': UserSerializer(users, many=True).data
+        'users': serialize_users(page),
+        'next_cursor': next_cursor
     }, status=status.HTTP_200_OK)
 
 
+def stream_users_ndjson(users, chunk_size=2000):
+    """Yield one JSON document per user without loading the whole table."""
+    for user in users.iterator(chunk_size=chunk_size):
+        yield json.dumps(serialize_user(user), cls=JSONEncoder) + '\n'
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAdmin])
 def admin_create_user(request):
@@ -346,7 +548,7 @@ def admin_create_user(request):
         return Response({
             'success': True,
             'message': 'User created successfully!',
-            'user': UserSerializer(user).data
+            'user': serialize_user(user)
         }, status=status.HTTP_201_CREATED)
     
     # Handle validation errors
@@ -363,6 +565,152 @@ def admin_create_user(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdmin])
+@parser_classes([FastJSONParser, CSVParser, MultiPartParser])
+def admin_bulk_create_users(request):
+    """
+    POST /api/admin/bulk-create-users/
+    Admin creates many pre-verified users at once.
+    
+    Accepts JSON ({"users": [...]}), a CSV body (text/csv) or a CSV file
+    uploaded as "file", with columns email, first_name, last_name, password
+    and optionally role. Returns a result for every row.
+    """
+    if 'file' in request.FILES:
+        try:
+            rows = CSVParser().parse(request.FILES['file'])['users']
+        except ParseError as exc:
+            return Response({
+                'success': False,
+                'message': str(exc.detail)
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif isinstance(request.data, dict):
+        rows = request.data.get('users')
+    else:
+        # e.g. a top-level JSON array
+        rows = None
+    
+    if not isinstance(rows, list) or not rows:
+        return Response({
+            'success': False,
+            'message': 'Provide a non-empty list of users.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if len(rows) > BULK_CREATE_MAX_ROWS:
+        return Response({
+            'success': False,
+            'message': f'At most {BULK_CREATE_MAX_ROWS} users can be created per request.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = [{'row': index, 'success': False} for index in range(1, len(rows) + 1)]
+    valid = []
+    
+    # Validate every row without touching the database
+    for result, row in zip(results, rows):
+        if isinstance(row, dict):
+            # Blank CSV cells fall back to field defaults
+            row = {key: value for key, value in row.items() if value not in ('', None)}
+        serializer = BulkCreateUserRowSerializer(data=row)
+        if not serializer.is_valid():
+            result['email'] = row.get('email') if isinstance(row, dict) else None
+            errors = []
+            for field, messages in serializer.errors.items():
+                if isinstance(messages, list):
+                    errors.append(f"{field}: {', '.join(messages)}")
+                else:
+                    errors.append(f"{field}: {messages}")
+            result['message'] = '; '.join(errors)
+            continue
+        data = serializer.validated_data
+        data['email'] = User.objects.normalize_email(data['email'])
+        result['email'] = data['email']
+        valid.append((result, data))
+    
+    # One query for every email that is already taken
+    existing = set(User.objects.filter(
+        email__in=[data['email'] for result, data in valid]
+    ).values_list('email', flat=True))
+    
+    to_create = []
+    seen = set()
+    for result, data in valid:
+        if data['email'] in existing:
+            result['message'] = 'User with this email already exists.'
+        elif data['email'] in seen:
+            result['message'] = 'Duplicate email in this upload.'
+        else:
+            seen.add(data['email'])
+            to_create.append((result, data))
+    
+    # Hash and save in groups: rows saved before the pool gets busy, or
+    # before another request takes one of the emails, stay saved
+    created = 0
+    busy = False
+    conflict = False
+    for start in range(0, len(to_create), BULK_CREATE_BATCH_SIZE):
+        batch = to_create[start:start + BULK_CREATE_BATCH_SIZE]
+        if busy:
+            for result, data in batch:
+                result['message'] = 'Not created: the server was busy. Please upload this row again.'
+            continue
+        try:
+            passwords = hashing.make_passwords([data['password'] for result, data in batch])
+        except HashingUnavailable:
+            if not created:
+                raise
+            busy = True
+            for result, data in batch:
+                result['message'] = 'Not created: the server was busy. Please upload this row again.'
+            continue
+        users = [
+            User(
+                email=data['email'],
+                password=password,
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                role=data['role'],
+                is_email_verified=True  # Admin-created users are pre-verified
+            )
+            for (result, data), password in zip(batch, passwords)
+        ]
+        
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+        except IntegrityError:
+            # Another request registered one of these emails meanwhile
+            conflict = True
+            for result, data in batch:
+                result['message'] = 'Not created: another request created one of the users in this group. Please upload this row again.'
+            continue
+        
+        for (result, data), user in zip(batch, users):
+            result['success'] = True
+            result['id'] = user.pk
+            result['message'] = 'User created successfully!'
+        created += len(users)
+    
+    # bulk_create() sends no post_save signals
+    if created:
+        invalidate('users')
+        routers.pin('users')
+    
+    if created:
+        response_status = status.HTTP_201_CREATED
+    elif conflict:
+        response_status = status.HTTP_409_CONFLICT
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({
+        'success': created > 0,
+        'message': f'{created} of {len(rows)} users created.',
+        'created': created,
+        'failed': len(rows) - created,
+        'results': results
+    }, status=response_status)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAdmin])
 def approve_user(request):
@@ -402,7 +750,8 @@ def approve_user(request):
     login_attempt.blocked = False
     login_attempt.attempts = 0
     login_attempt.admin_token = None
-    login_attempt.save()
+    login_attempt.save(update_fields=['admin_approved', 'blocked', 'attempts', 'admin_token', 'last_attempt'])
+    get_attempt_backend().reset(email)
     
     return Response({
         'success': True,
@@ -414,37 +763,45 @@ def approve_user(request):
 # LOGIN ATTEMPT ENDPOINTS
 # ============================================================================
 
+@routers.replica_reads(lambda request, email: [f'email:{normalize_email(email)}'])
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limit('login_attempts'))
+@cache_response(
+    lambda request, email: [f'login_attempts:{normalize_email(email)}'],
+    scope=None,
+    # Failed attempts below the limit are counted outside the database
+    vary_on=lambda request, email: str(get_attempt_backend().get(normalize_email(email))),
+)
 def get_login_attempts(request, email):
     """
     GET /api/auth/login-attempts/<email>/
     Get login attempt info for an email.
     """
-    try:
-        login_attempt = LoginAttempt.objects.get(email=email)
-        return Response({
-            'success': True,
-            'email': login_attempt.email,
-            'attempts': login_attempt.attempts,
-            'blocked': login_attempt.blocked,
-            'admin_approved': login_attempt.admin_approved,
-            'last_attempt': login_attempt.last_attempt
-        }, status=status.HTTP_200_OK)
+    email = normalize_email(email)
     
-    except LoginAttempt.DoesNotExist:
-        return Response({
-            'success': True,
-            'email': email,
-            'attempts': 0,
-            'blocked': False,
-            'admin_approved': False,
-            'last_attempt': None
-        }, status=status.HTTP_200_OK)
+    login_attempt = LoginAttempt.objects.filter(email=email).first()
+    
+    # Blocked accounts are persisted; anything below the limit is only
+    # counted by the attempt backend.
+    if login_attempt and login_attempt.blocked:
+        attempts = login_attempt.attempts
+    else:
+        attempts = get_attempt_backend().get(email)
+    
+    return Response({
+        'success': True,
+        'email': email,
+        'attempts': attempts,
+        'blocked': login_attempt.blocked if login_attempt else False,
+        'admin_approved': login_attempt.admin_approved if login_attempt else False,
+        'last_attempt': login_attempt.last_attempt if login_attempt else None
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limit('setup_admin'))
 def setup_admin(request):
     """
     POST /api/admin/setup/
@@ -493,7 +850,7 @@ def setup_admin(request):
     return Response({
         'success': True,
         'message': 'Admin user created successfully! You can now login.',
-        'user': UserSerializer(admin_user).data
+        'user': serialize_user(admin_user)
     }, status=status.HTTP_201_CREATED)
 
 
@@ -507,12 +864,48 @@ def health_check(request):
     return Response({
         'success': True,
         'status': 'API is running',
-        'message': 'Backend is awake and ready!'
+        'message': 'Backend is awake and ready!',
+        'hashing': hashing.stats()
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@authentication_classes([MetricsTokenAuthentication, CachedJWTAuthentication])
+@permission_classes([IsAdmin | HasMetricsToken])
+def prometheus_metrics(request):
+    """
+    GET /api/metrics/
+    Per-view request metrics of this worker process in Prometheus text format.
+    Admin only, or a scraper sending METRICS_TOKEN as a bearer token.
+    Each worker process answers with its own numbers (see api/metrics.py).
+    """
+    return HttpResponse(
+        metrics.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def jwks(request):
+    """
+    GET /.well-known/jwks.json
+    Public keys that verify this service's tokens (see api/signing.py).
+    Empty while tokens are signed with HS256.
+    """
+    body = json.dumps(signing.get_token_backend().get_jwks()).encode()
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = make_etag(body)
+    # Keys are published JWKS_MAX_AGE before they sign anything, so
+    # consumers and CDNs can keep this for that long
+    patch_cache_control(response, public=True, max_age=signing.get_signing_settings()['JWKS_MAX_AGE'])
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limit('request_admin_approval'))
 def request_admin_approval(request):
     """
     POST /api/auth/request-admin-approval/
@@ -538,7 +931,7 @@ def request_admin_approval(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Check if user has enough attempts to be blocked
-    if login_attempt.attempts < 5:
+    if login_attempt.attempts < get_attempt_settings()['MAX_ATTEMPTS']:
         return Response({
             'success': False,
             'message': 'Account is not blocked.'
@@ -547,10 +940,10 @@ def request_admin_approval(request):
     # Generate admin token
     admin_token = generate_admin_token()
     login_attempt.admin_token = admin_token
-    login_attempt.save()
+    login_attempt.save(update_fields=['admin_token', 'last_attempt'])
     
-    # TODO: Send email to admin with token
-    # For now, we'll just return the token in development
+    # Queued for `manage.py send_queued_mail`; never waits on SMTP
+    mail.enqueue(**mail.admin_approval_email(email, admin_token))
     
     return Response({
         'success': True,
@@ -0,0 +1,157 @@
+"""
+Write-behind buffers for non-critical user columns.
+
+Bumping ``last_login_at`` used to cost every successful login a full
+``UPDATE`` of the user row. Nothing reads the value on the request path, so
+``last_login`` collects it in memory instead: repeated logins of one user
+coalesce into one entry, and a background thread writes everything pending
+in a single statement::
+
+    UPDATE api_user SET last_login_at = CASE WHEN id = 1 THEN ... WHEN id = 7 THEN ... END
+    WHERE id IN (1, 7, ...)
+
+every ``FLUSH_INTERVAL`` seconds, as soon as ``MAX_PENDING`` users are
+waiting, and when the process exits. A failed flush keeps its values for
+the next one. If a worker is killed outright, the logins it had buffered
+keep their previous ``last_login_at``.
+
+With ``WRITE_BEHIND['ENABLED']`` off, ``touch()`` writes straight away
+(still a single-column ``UPDATE``).
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, Value, When
+
+from . import metrics
+from .authentication import invalidate_user
+from .models import User
+from .response_cache import invalidate
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'FLUSH_INTERVAL': 5,
+    'MAX_PENDING': 500,
+}
+
+flushed = metrics.counter(
+    'api_write_behind_flushed_total',
+    'Rows written by write-behind flushes.',
+)
+flush_failures = metrics.counter(
+    'api_write_behind_flush_failures_total',
+    'Write-behind flushes that failed and were kept for retry.',
+)
+
+
+def get_write_behind_settings():
+    """Return ``WRITE_BEHIND`` with defaults filled in."""
+    return {**DEFAULTS, **getattr(settings, 'WRITE_BEHIND', {})}
+
+
+class WriteBehindBuffer:
+    """Latest pending value of one column, per primary key."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = None
+        self._pid = None
+
+    def touch(self, pk, value):
+        """Set ``field`` of row ``pk`` to ``value``, soon."""
+        options = get_write_behind_settings()
+        if not options['ENABLED']:
+            self._write({pk: value})
+            return
+        with self._lock:
+            self._pending[pk] = value
+            pending = len(self._pending)
+            self._start_flusher()
+        if pending >= options['MAX_PENDING']:
+            self._wake.set()
+
+    async def atouch(self, pk, value):
+        """Async version of touch(), for the ASGI views."""
+        if not get_write_behind_settings()['ENABLED']:
+            await sync_to_async(self._write)({pk: value})
+            return
+        self.touch(pk, value)
+
+    def flush(self):
+        """Write everything pending; returns the number of rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            self._write(pending)
+        except Exception:
+            flush_failures.inc()
+            with self._lock:
+                # Values touched since the swap are newer than ours
+                self._pending = {**pending, **self._pending}
+            raise
+        flushed.inc(len(pending))
+        return len(pending)
+
+    def _write(self, values):
+        whens = [When(pk=pk, then=Value(value)) for pk, value in values.items()]
+        self.model.objects.filter(pk__in=values).update(**{
+            self.field: Case(*whens, output_field=self.model._meta.get_field(self.field)),
+        })
+        # update() sends no post_save signal. The new values are not worth
+        # pinning reads to the primary for (see api.routers).
+        for pk in values:
+            invalidate_user(pk)
+        invalidate('users', *(f'user:{pk}' for pk in values))
+
+    def _start_flusher(self):
+        # Called with the lock held. Threads do not survive a fork, so each
+        # worker process starts its own.
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._flusher = threading.Thread(
+            target=self._run, name=f'write-behind-{self.field}', daemon=True,
+        )
+        self._flusher.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(get_write_behind_settings()['FLUSH_INTERVAL'])
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Write-behind flush of %s.%s failed', self.model.__name__, self.field)
+            finally:
+                # Do not hold a connection open while waiting
+                connections.close_all()
+
+
+last_login = WriteBehindBuffer(User, 'last_login_at')
+
+
+def flush_all():
+    """Write every buffer out, logging failures; runs at exit."""
+    for buffer in (last_login,):
+        try:
+            buffer.flush()
+        except Exception:
+            logger.exception('Write-behind flush of %s.%s failed', buffer.model.__name__, buffer.field)
+
+
+atexit.register(flush_all)
@@ -9,9 +9,15 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'authentication.settings')
 
 application = get_asgi_application()
 
+if settings.ASYNC_VIEWS:
+    # WhiteNoise is disabled in async mode, so serve /static/ here
+    application = ASGIStaticFilesHandler(application)
+
@@ -5,7 +5,7 @@ Django settings for authentication project.
 from pathlib import Path
 import os
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestTimingMiddleware',  # Server-Timing and /api/metrics/ - keep first
+    'api.middleware.RateLimitHeadersMiddleware',  # X-RateLimit-* (see api/throttling.py)
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files
     'corsheaders.middleware.CorsMiddleware',  # CORS - must be before CommonMiddleware
@@ -53,6 +55,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Send a Server-Timing header (auth, db, hash, serialize, total) with every
+# response. Off by default in production: the header tells any client how
+# long hashing and queries took. Per-view metrics at /api/metrics/ are
+# collected either way.
+SERVER_TIMING = config('SERVER_TIMING', default=DEBUG, cast=bool)
+
+# /api/metrics/ is for the admin, or for a Prometheus server sending this token
+# as a bearer token (scrape_config: authorization: credentials: <token>).
+# Empty lets only the admin read it. Each worker process keeps its own
+# metrics, so with several workers a scrape sees whichever one answered.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Serve the authentication endpoints with native async views (api/async_views.py).
+# Only useful under ASGI, e.g.:
+#   gunicorn authentication.asgi:application -k uvicorn.workers.UvicornWorker
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+if ASYNC_VIEWS:
+    # WhiteNoise is sync-only and would push every request onto a thread;
+    # authentication/asgi.py serves static files instead.
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'authentication.urls'
 
 TEMPLATES = [
@@ -77,11 +101,19 @@ WSGI_APPLICATION = 'authentication.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DB_POOL_MODE picks how connections are reused (see ENV_SETUP.md):
+#   persistent - one connection per thread, kept for DB_CONN_MAX_AGE seconds
+#   pool       - a per-process pool of DB_POOL_SIZE connections (api/postgresql_pool)
+#   pgbouncer  - persistent connections to a transaction-pooling PgBouncer
+# Reused connections are health-checked before each request in every mode.
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent')
+
 if os.getenv('DATABASE_URL'):
     DATABASES = {
         'default': dj_database_url.config(
             default=config('DATABASE_URL'),
-            conn_max_age=600
+            conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+            conn_health_checks=True,
         )
     }
 else:
@@ -89,9 +121,58 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # api.tests logs in from several threads at once, which the
+            # default in-memory test database cannot serve
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
+# Read-only endpoints read from this replica when set (see api/routers.py).
+# Locally, a copy of the SQLite file works: sqlite:///db-replica.sqlite3
+if config('REPLICA_DATABASE_URL', default=''):
+    DATABASES['replica'] = dj_database_url.parse(
+        config('REPLICA_DATABASE_URL'),
+        conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+        conn_health_checks=True,
+    )
+    # Tests run against a single database
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+for database in DATABASES.values():
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    database.setdefault('OPTIONS', {}).update({
+        'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        # Notice dropped connections (e.g. after a failover) within a minute
+        'keepalives': 1,
+        'keepalives_idle': 30,
+        'keepalives_interval': 10,
+        'keepalives_count': 3,
+    })
+    if DB_POOL_MODE == 'pool':
+        database.update({
+            'ENGINE': 'api.postgresql_pool',
+            # The pool decides when connections close
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                # One per gunicorn thread (render.yaml)
+                'MAX_SIZE': config('DB_POOL_SIZE', default=4, cast=int),
+                'TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                'MAX_LIFETIME': config('DB_CONN_MAX_AGE', default=600, cast=int),
+                'HEALTH_CHECK_AFTER': 1,
+            },
+        })
+    elif DB_POOL_MODE == 'pgbouncer':
+        # Named cursors do not survive PgBouncer moving the session
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+DATABASE_ROUTERS = ['api.routers.ReadReplicaRouter']
+
+READ_REPLICA = {
+    'ALIAS': 'replica',
+    'STICKY_SECONDS': config('REPLICA_STICKY_SECONDS', default=10, cast=int),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -115,6 +196,138 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing cost (see api/hashers.py). `python manage.py
+# tune_password_hasher` suggests values for a latency budget on this host.
+# Stored hashes made with other settings are upgraded on the next login.
+PASSWORD_HASHER_PROFILE = {
+    'ALGORITHM': config('PASSWORD_HASHER', default='pbkdf2_sha256'),  # pbkdf2_sha256, scrypt or argon2
+    'PBKDF2_ITERATIONS': config('PBKDF2_ITERATIONS', default=600000, cast=int),
+    'SCRYPT_WORK_FACTOR': config('SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int),
+    'SCRYPT_BLOCK_SIZE': config('SCRYPT_BLOCK_SIZE', default=8, cast=int),
+    'SCRYPT_PARALLELISM': 1,
+    'ARGON2_TIME_COST': config('ARGON2_TIME_COST', default=2, cast=int),
+    'ARGON2_MEMORY_COST': config('ARGON2_MEMORY_COST', default=102400, cast=int),  # KiB
+    'ARGON2_PARALLELISM': config('ARGON2_PARALLELISM', default=8, cast=int),
+}
+
+TUNED_PASSWORD_HASHERS = {
+    'pbkdf2_sha256': 'api.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'api.hashers.TunedScryptPasswordHasher',
+    'argon2': 'api.hashers.TunedArgon2PasswordHasher',
+}
+
+# The configured algorithm hashes new passwords; the rest still verify old ones
+PASSWORD_HASHERS = [TUNED_PASSWORD_HASHERS[PASSWORD_HASHER_PROFILE['ALGORITHM']]] + [
+    path for algorithm, path in TUNED_PASSWORD_HASHERS.items()
+    if algorithm != PASSWORD_HASHER_PROFILE['ALGORITHM']
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+
+# Password hashing pool (see api/hashing.py)
+# Set HASHING_WORKERS=0 to hash on the request thread instead.
+PASSWORD_HASHING_POOL = {
+    'WORKERS': config('HASHING_WORKERS', default=os.cpu_count() or 1, cast=int),
+    'MAX_PENDING': config('HASHING_MAX_PENDING', default=(os.cpu_count() or 1) * 4, cast=int),
+    'TIMEOUT': config('HASHING_TIMEOUT', default=10, cast=int),
+    # Bulk hashing jobs in the pool at once, across all batches; the rest
+    # of the workers stay free for logins
+    'BATCH_IN_FLIGHT': config('HASHING_BATCH_IN_FLIGHT', default=max((os.cpu_count() or 1) // 2, 1), cast=int),
+}
+
+
+# Cache (shared between workers when REDIS_URL is set)
+if config('REDIS_URL', default=''):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Failed-login counters (see api/attempts.py)
+LOGIN_ATTEMPTS = {
+    'BACKEND': config('LOGIN_ATTEMPTS_BACKEND', default='api.attempts.CacheAttemptBackend'),
+    'MAX_ATTEMPTS': 5,
+    'TTL': config('LOGIN_ATTEMPTS_TTL', default=3600, cast=int),
+}
+
+
+# Per-process cache of authenticated users (see api/authentication.py)
+USER_SNAPSHOT_CACHE = {
+    'TTL': config('USER_SNAPSHOT_TTL', default=60, cast=int),
+    'MAX_ENTRIES': 10000,
+}
+
+
+# Cached bodies of the read-only endpoints (see api/response_cache.py).
+# Invalidated on writes; TIMEOUT bounds staleness across workers that do not
+# share a cache. 0 disables the cache but keeps ETag/304 support.
+RESPONSE_CACHE = {
+    'TIMEOUT': config('RESPONSE_CACHE_TIMEOUT', default=30, cast=int),
+    'CACHE_ALIAS': 'default',
+}
+
+
+# Deleting expired tokens and idle LoginAttempt rows (see api/purge.py).
+# Set PURGE_INTERVAL (seconds) to purge from a background thread in every
+# web process instead of running `manage.py purge_stale_records` from cron.
+PURGE = {
+    'INTERVAL': config('PURGE_INTERVAL', default=0, cast=int),
+    'BATCH_SIZE': 500,
+    'BATCH_PAUSE': 0.1,
+    'LOGIN_ATTEMPT_IDLE_DAYS': 30,
+}
+
+
+# Rate limits for the AllowAny endpoints, per client IP and per email
+# (see api/throttling.py). Counters are shared between workers only when
+# REDIS_URL is set.
+RATE_LIMITS = {
+    'ENABLED': config('RATE_LIMITS_ENABLED', default=True, cast=bool),
+    'CACHE_ALIAS': 'default',
+    'RATES': {
+        'register': {'ip': '10/hour'},
+        'verify_email': {'ip': '30/min', 'email': '10/15min'},
+        'login': {'ip': '30/min', 'email': '10/min'},
+        'login_attempts': {'ip': '60/min'},
+        'refresh': {'ip': '60/min'},
+        'request_admin_approval': {'ip': '10/hour', 'email': '3/hour'},
+        'setup_admin': {'ip': '5/hour'},
+    },
+}
+
+
+# Per-process bloom filter of blacklisted token JTIs (see api/revocation.py)
+TOKEN_REVOCATION = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'REFRESH_INTERVAL': config('TOKEN_REVOCATION_REFRESH', default=5, cast=int),
+    'REBUILD_INTERVAL': 60 * 60,
+    # Blacklist rows that commit out of id order are still seen if they
+    # commit within this many seconds
+    'RESCAN_WINDOW': 60,
+}
+
+# POST /api/auth/introspect/ for services that cannot verify tokens themselves
+# (see api/introspection.py). Callers send one of the keys as X-API-Key.
+TOKEN_INTROSPECTION = {
+    'API_KEYS': config('INTROSPECTION_API_KEYS', default='', cast=Csv()),
+    'MAX_TOKENS': config('INTROSPECTION_MAX_TOKENS', default=100, cast=int),
+    'CACHE_TTL': config('INTROSPECTION_CACHE_TTL', default=5, cast=int),
+    'CACHE_MAX_ENTRIES': 10000,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -146,20 +359,48 @@ AUTH_USER_MODEL = 'api.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON, same bytes as DRF's (see api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'EXCEPTION_HANDLER': 'api.exceptions.custom_exception_handler',
+    # Proxies in front of the app (1 on Render), so client IPs are read from
+    # the right X-Forwarded-For entry. Unset trusts the whole header.
+    'NUM_PROXIES': config('NUM_PROXIES', default=None, cast=lambda value: None if value in (None, '') else int(value)),
 }
 
+# last_login_at is written in batches instead of on every login (see api/write_behind.py)
+WRITE_BEHIND = {
+    'ENABLED': config('WRITE_BEHIND_ENABLED', default=True, cast=bool),
+    'FLUSH_INTERVAL': config('WRITE_BEHIND_FLUSH_INTERVAL', default=5, cast=int),
+    'MAX_PENDING': config('WRITE_BEHIND_MAX_PENDING', default=500, cast=int),
+}
+
+# Serialize users with the precomputed converter in api/serializers.py
+# instead of instantiating UserSerializer for every response.
+FAST_USER_SERIALIZER = config('FAST_USER_SERIALIZER', default=True, cast=bool)
+
+# Render and parse JSON with orjson when it is installed; False uses DRF's
+# stdlib JSONRenderer / JSONParser.
+FAST_JSON = config('FAST_JSON', default=True, cast=bool)
+
 
 # Simple JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=20),  # For regular users - 20 minutes
     'REFRESH_TOKEN_LIFETIME': timedelta(days=365),  # For admin
-    'ROTATE_REFRESH_TOKENS': False,
+    'ROTATE_REFRESH_TOKENS': True,  # /api/auth/refresh/ issues a new refresh token each time
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': False,
     
@@ -174,11 +415,28 @@ SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
     
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('api.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
 
+def _pem(name):
+    """PEM text from ``<name>`` (\\n for line breaks) or the file named by ``<name>_FILE``."""
+    path = config(f'{name}_FILE', default='')
+    return Path(path).read_text() if path else config(name, default='').replace('\\n', '\n')
+
+
+# How api.tokens signs and verifies tokens (see api/signing.py). ALGORITHM and
+# SIGNING_KEY above only apply to simplejwt's own token classes.
+JWT_SIGNING = {
+    'ALGORITHM': config('JWT_ALGORITHM', default='HS256'),  # HS256, RS256 or EdDSA
+    'PRIVATE_KEY': _pem('JWT_PRIVATE_KEY'),
+    'PUBLIC_KEYS': _pem('JWT_PUBLIC_KEYS'),  # next / retired keys during a rotation
+    'ACCEPT_HS256': config('JWT_ACCEPT_HS256', default=False, cast=bool),
+    'JWKS_MAX_AGE': config('JWT_JWKS_MAX_AGE', default=3600, cast=int),
+}
+
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "https://strathmore-insight-nexus-2024.web.app",
@@ -219,6 +477,14 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@strathmore.edu')
 
+# Outbox sent by `python manage.py send_queued_mail` (see api/mail.py)
+MAIL_QUEUE = {
+    'BATCH_SIZE': config('MAIL_QUEUE_BATCH_SIZE', default=50, cast=int),
+    'MAX_ATTEMPTS': config('MAIL_QUEUE_MAX_ATTEMPTS', default=5, cast=int),
+    'RETRY_DELAY': 60,  # Seconds before the first retry; doubles each time
+    'LEASE': 5 * 60,
+}
+
 
 # Admin email
 ADMIN_EMAIL = 'walter45oyugi@gmail.com'
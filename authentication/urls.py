@@ -4,8 +4,12 @@ URL configuration for authentication project.
 from django.contrib import admin
 from django.urls import path, include
 
+from api import views as api_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    # Public keys for verifying tokens elsewhere (see api/signing.py)
+    path('.well-known/jwks.json', api_views.jwks, name='jwks'),
 ]
 